@@ -6,9 +6,35 @@ to PowerPoint TextRange objects.
 """
 
 import re
+import functools
 from html.parser import HTMLParser
 
 
+# Named colors (basic support), already in PowerPoint's R + G*256 + B*65536 layout
+COLOR_MAP = {
+    'red': 255, 'blue': 16711680, 'green': 65280,
+    'yellow': 65535, 'orange': 33023, 'purple': 8388736,
+    'black': 0, 'white': 16777215
+}
+
+
+def html_color_to_rgb(color_value):
+    """
+    Convert an HTML color ('#RRGGBB' or a name from COLOR_MAP) to a PowerPoint RGB value.
+    
+    Returns:
+        int or None: PowerPoint color value, or None if the color is not recognised
+    """
+    if color_value.startswith('#'):
+        hex_color = color_value[1:]
+        if len(hex_color) != 6:
+            return None
+        # Swap the R and B bytes: PowerPoint stores R + (G * 256) + (B * 65536)
+        v = int(hex_color, 16)
+        return ((v & 0xFF) << 16) | (v & 0xFF00) | ((v >> 16) & 0xFF)
+    return COLOR_MAP.get(color_value.lower())
+
+
 class PowerPointHTMLParser(HTMLParser):
     """HTML parser specifically designed for PowerPoint text formatting."""
     
@@ -18,11 +44,18 @@ class PowerPointHTMLParser(HTMLParser):
     
     def reset_parser(self):
         """Reset the parser state."""
-        self.plain_text = ""
+        # Text pieces are collected in a list and joined on demand; += on an
+        # attribute string copies the whole text for every data chunk
+        self._text_parts = []
         self.format_segments = []
         self.tag_stack = []
         self.current_position = 0
         
+    @property
+    def plain_text(self):
+        """Text collected so far, without HTML tags."""
+        return ''.join(self._text_parts)
+    
     def handle_starttag(self, tag, attrs):
         """Handle opening HTML tags."""
         formatting = {}
@@ -30,7 +63,7 @@ class PowerPointHTMLParser(HTMLParser):
         # Handle self-closing tags that insert content
         if tag == 'br':
             # Insert a line break
-            self.plain_text += '\n'
+            self._text_parts.append('\n')
             self.current_position += 1
             return  # Don't push to stack for self-closing tags
         
@@ -82,12 +115,12 @@ class PowerPointHTMLParser(HTMLParser):
         """Handle self-closing tags like <br />."""
         if tag == 'br':
             # Insert a line break
-            self.plain_text += '\n'
+            self._text_parts.append('\n')
             self.current_position += 1
     
     def handle_data(self, data):
         """Handle text content."""
-        self.plain_text += data
+        self._text_parts.append(data)
         self.current_position += len(data)
     
     def _parse_style(self, style_str):
@@ -148,6 +181,30 @@ def parse_html_text(html_text):
     return parser.plain_text, parser.format_segments
 
 
+_SPACES_RE = re.compile(r'[ \t]+')
+_EMPTY_LINES_RE = re.compile(r'\n\s*\n')
+
+
+def _normalize_whitespace(text):
+    """Collapse runs of spaces/tabs and empty lines, then strip."""
+    text = _SPACES_RE.sub(' ', text)  # Normalize spaces and tabs to single spaces
+    text = _EMPTY_LINES_RE.sub('\n', text)  # Remove empty lines
+    return text.strip()
+
+
+# List, header and block-tag patterns used by process_html_lists, compiled once
+_UL_RE = re.compile(r'<ul[^>]*>(.*?)</ul>', re.DOTALL | re.IGNORECASE)
+_OL_RE = re.compile(r'<ol[^>]*>(.*?)</ol>', re.DOTALL | re.IGNORECASE)
+_LI_RE = re.compile(r'<li[^>]*>(.*?)</li>', re.DOTALL)
+_HEADER_PATTERN = r'<h([1-6])[^>]*>(.*?)</h[1-6]>'
+_HEADER_FIND_RE = re.compile(_HEADER_PATTERN, re.IGNORECASE)
+_HEADER_SUB_RE = re.compile(_HEADER_PATTERN, re.DOTALL | re.IGNORECASE)
+_BLOCK_TAG_RES = tuple(
+    re.compile(f'<{tag}[^>]*>(.*?)</{tag}>', re.DOTALL | re.IGNORECASE)
+    for tag in ('p', 'div', 'section', 'article', 'main', 'aside', 'nav', 'header', 'footer')
+)
+
+
 def process_html_lists(text):
     """
     Process HTML lists and convert to PowerPoint-friendly format.
@@ -161,61 +218,38 @@ def process_html_lists(text):
     list_info = []
     original_text = text
     
-    # Handle unordered lists (ul/li)
-    ul_pattern = r'<ul[^>]*>(.*?)</ul>'
-    ol_pattern = r'<ol[^>]*>(.*?)</ol>'
-    li_pattern = r'<li[^>]*>(.*?)</li>'
-    
     def process_ul(match):
         ul_content = match.group(1)
-        li_matches = re.finditer(li_pattern, ul_content, re.DOTALL)
-        
-        result = ""
-        for li_match in li_matches:
-            li_content = li_match.group(1).strip()
-            # Keep nested HTML tags for further processing
-            result += f"• {li_content}\n"
-        
-        return result.rstrip()
+        # Keep nested HTML tags for further processing
+        return "\n".join(f"• {li_match.group(1).strip()}" for li_match in _LI_RE.finditer(ul_content)).rstrip()
     
     def process_ol(match):
         ol_content = match.group(1)
-        li_matches = list(re.finditer(li_pattern, ol_content, re.DOTALL))
-        
-        result = ""
-        for i, li_match in enumerate(li_matches, 1):
-            li_content = li_match.group(1).strip()
-            # Keep nested HTML tags for further processing
-            result += f"{i}. {li_content}\n"
-        
-        return result.rstrip()
+        # Keep nested HTML tags for further processing
+        return "\n".join(f"{i}. {li_match.group(1).strip()}"
+                         for i, li_match in enumerate(_LI_RE.finditer(ol_content), 1)).rstrip()
     
     # Process lists first
-    text = re.sub(ul_pattern, process_ul, text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(ol_pattern, process_ol, text, flags=re.DOTALL | re.IGNORECASE)
+    text = _UL_RE.sub(process_ul, text)
+    text = _OL_RE.sub(process_ol, text)
     
     # Process headers and store their info
-    header_pattern = r'<h([1-6])[^>]*>(.*?)</h[1-6]>'
     header_matches = []
     
-    for match in re.finditer(header_pattern, text, re.IGNORECASE):
+    for match in _HEADER_FIND_RE.finditer(text):
         level = int(match.group(1))
         content = match.group(2).strip()
         header_matches.append((match.start(), match.end(), level, content))
     
     # Replace headers with their content
-    text = re.sub(header_pattern, r'\2', text, flags=re.DOTALL | re.IGNORECASE)
+    text = _HEADER_SUB_RE.sub(r'\2', text)
     
     # Remove other block tags like <p>, <div>, etc., but keep their content
-    block_tags = ['p', 'div', 'section', 'article', 'main', 'aside', 'nav', 'header', 'footer']
-    for tag in block_tags:
-        pattern = f'<{tag}[^>]*>(.*?)</{tag}>'
-        text = re.sub(pattern, r'\1', text, flags=re.DOTALL | re.IGNORECASE)
+    for block_re in _BLOCK_TAG_RES:
+        text = block_re.sub(r'\1', text)
     
     # Clean up extra whitespace and normalize - but preserve list line breaks
-    text = re.sub(r'[ \t]+', ' ', text)  # Normalize spaces and tabs to single spaces
-    text = re.sub(r'\n\s*\n', '\n', text)  # Remove empty lines
-    text = text.strip()
+    text = _normalize_whitespace(text)
     
     # Add header info based on content matching
     lines = text.split('\n')
@@ -233,6 +267,87 @@ def process_html_lists(text):
     return text, list_info
 
 
+# Bit flags packed into compiled formatting segments
+FMT_BOLD = 1
+FMT_ITALIC = 2
+FMT_UNDERLINE = 4
+FMT_STRIKE = 8
+
+
+def compile_format_segments(segments):
+    """
+    Reduce formatting segments to flat tuples for tight application loops.
+    
+    Args:
+        segments (list): Formatting segments from parse_html_text
+        
+    Returns:
+        tuple: (start, length, flags, color_rgb, background_rgb) per non-empty
+            segment with formatting PowerPoint can apply; start stays 1-based, flags is a FMT_*
+            bitmask and the colors are PowerPoint RGB values or None
+    """
+    compiled = []
+    for segment in segments:
+        formatting = segment['formatting']
+        if not formatting or segment['length'] <= 0:
+            continue
+        
+        flags = 0
+        if formatting.get('bold'):
+            flags |= FMT_BOLD
+        if formatting.get('italic'):
+            flags |= FMT_ITALIC
+        if formatting.get('underline'):
+            flags |= FMT_UNDERLINE
+        if formatting.get('strikethrough'):
+            flags |= FMT_STRIKE
+        
+        color_rgb = background_rgb = None
+        if formatting.get('color'):
+            try:
+                color_rgb = html_color_to_rgb(formatting['color'])
+            except Exception as e:
+                print(f"Warning: Could not apply color {formatting.get('color')}: {e}")
+        if formatting.get('background_color'):
+            try:
+                bg_value = formatting['background_color']
+                if bg_value.startswith('#'):
+                    background_rgb = html_color_to_rgb(bg_value)
+            except Exception as e:
+                print(f"Warning: Could not apply background color {formatting.get('background_color')}: {e}")
+        
+        # Segments such as <h1> or unsupported styles carry nothing to apply
+        if flags or color_rgb is not None or background_rgb is not None:
+            compiled.append((segment['start'], segment['length'], flags, color_rgb, background_rgb))
+    return tuple(compiled)
+
+
+@functools.lru_cache(maxsize=512)
+def parse_html_cached(html_text):
+    """
+    Process lists/headers and inline formatting of HTML text, memoized on the input.
+    
+    Both steps are pure functions of the text, and agents often resend the same
+    HTML (retries, repeated replacements), so results are cached.
+    
+    Args:
+        html_text (str): Text with HTML formatting
+        
+    Returns:
+        tuple: (plain_text, formatting_segments, list_info)
+            - formatting_segments are compiled (see compile_format_segments)
+            - formatting_segments and list_info are tuples shared between
+              callers and must be treated as read-only
+    """
+    # Plain text (no tags, no entities) only needs whitespace normalization
+    if '<' not in html_text and '&' not in html_text:
+        return _normalize_whitespace(html_text), (), ()
+    
+    processed_text, list_info = process_html_lists(html_text)
+    plain_text, format_segments = parse_html_text(processed_text)
+    return plain_text, compile_format_segments(format_segments), tuple(list_info)
+
+
 def apply_html_formatting(text_range, plain_text, segments):
     """
     Apply HTML formatting to a PowerPoint TextRange.
@@ -242,38 +357,45 @@ def apply_html_formatting(text_range, plain_text, segments):
         plain_text (str): Plain text content
         segments (list): Formatting segments from parse_html_text
     """
+    apply_compiled_formatting(text_range, plain_text, compile_format_segments(segments))
+
+
+def apply_compiled_formatting(text_range, plain_text, segments):
+    """
+    Set the text of a PowerPoint TextRange and apply compiled formatting segments.
+    
+    Args:
+        text_range: PowerPoint TextRange object
+        plain_text (str): Plain text content
+        segments (tuple): Segments from compile_format_segments / parse_html_cached
+    """
     # Set the plain text first
     text_range.Text = plain_text
+    if not segments:
+        return
+    
+    text_length = len(plain_text)
     
     # Apply formatting to each segment
-    for segment in segments:
-        if not segment['formatting']:
-            continue
-            
+    for start_pos, length, flags, color_rgb, background_rgb in segments:
         try:
-            start_pos = segment['start']
-            length = segment['length']
-            
             # Ensure we don't exceed text bounds
-            if start_pos > len(plain_text) or start_pos + length - 1 > len(plain_text):
+            if start_pos > text_length or start_pos + length - 1 > text_length:
                 continue
             
             # Get the character range for this segment
             char_range = text_range.Characters(start_pos, length)
             
-            # Apply formatting
-            formatting = segment['formatting']
-            
-            if formatting.get('bold'):
+            if flags & FMT_BOLD:
                 char_range.Font.Bold = -1
                 
-            if formatting.get('italic'):
+            if flags & FMT_ITALIC:
                 char_range.Font.Italic = -1
                 
-            if formatting.get('underline'):
+            if flags & FMT_UNDERLINE:
                 char_range.Font.Underline = -1
                 
-            if formatting.get('strikethrough'):
+            if flags & FMT_STRIKE:
                 try:
                     char_range.Font.Strikethrough = -1
                 except:
@@ -283,50 +405,20 @@ def apply_html_formatting(text_range, plain_text, segments):
                     except:
                         pass  # Strikethrough not supported in all versions
                     
-            if formatting.get('color'):
+            if color_rgb is not None:
                 try:
-                    color_value = formatting['color']
-                    if color_value.startswith('#'):
-                        # Convert hex to RGB - PowerPoint uses RGB format, not BGR
-                        hex_color = color_value[1:]
-                        if len(hex_color) == 6:
-                            # Extract R, G, B components
-                            r = int(hex_color[0:2], 16)
-                            g = int(hex_color[2:4], 16) 
-                            b = int(hex_color[4:6], 16)
-                            # PowerPoint uses RGB format: R + (G * 256) + (B * 65536)
-                            rgb_color = r + (g * 256) + (b * 65536)
-                            char_range.Font.Color.RGB = rgb_color
-                    else:
-                        # Named colors (basic support)
-                        color_map = {
-                            'red': 255, 'blue': 16711680, 'green': 65280,
-                            'yellow': 65535, 'orange': 33023, 'purple': 8388736,
-                            'black': 0, 'white': 16777215
-                        }
-                        if color_value.lower() in color_map:
-                            char_range.Font.Color.RGB = color_map[color_value.lower()]
+                    char_range.Font.Color.RGB = color_rgb
                 except Exception as e:
-                    print(f"Warning: Could not apply color {formatting.get('color')}: {e}")
+                    print(f"Warning: Could not apply color {color_rgb}: {e}")
                     
-            if formatting.get('background_color'):
+            if background_rgb is not None:
                 try:
-                    bg_value = formatting['background_color']
-                    if bg_value.startswith('#'):
-                        hex_color = bg_value[1:]
-                        if len(hex_color) == 6:
-                            # Extract R, G, B components
-                            r = int(hex_color[0:2], 16)
-                            g = int(hex_color[2:4], 16) 
-                            b = int(hex_color[4:6], 16)
-                            # PowerPoint uses RGB format: R + (G * 256) + (B * 65536)
-                            rgb_color = r + (g * 256) + (b * 65536)
-                            char_range.Font.Fill.ForeColor.RGB = rgb_color
+                    char_range.Font.Fill.ForeColor.RGB = background_rgb
                 except Exception as e:
-                    print(f"Warning: Could not apply background color {formatting.get('background_color')}: {e}")
+                    print(f"Warning: Could not apply background color {background_rgb}: {e}")
                     
         except Exception as e:
-            print(f"Warning: Could not apply formatting to segment {segment}: {e}")
+            print(f"Warning: Could not apply formatting to segment at {start_pos}: {e}")
 
 
 # Convenience functions for common HTML patterns
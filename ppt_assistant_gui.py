@@ -15,6 +15,11 @@ ppt_smolagent = importlib.util.module_from_spec(spec)
 sys.modules["ppt_smolagent"] = ppt_smolagent
 spec.loader.exec_module(ppt_smolagent)
 
+# Syntax highlighting patterns for the generated code view, compiled once
+_KEYWORD_RE = re.compile(r'\b(?:def|import|from|if|else|elif|for|while|try|except|with|as|return|class|True|False|None)\b')
+_STRING_RES = (re.compile(r'"[^"]*"'), re.compile(r"'[^']*'"))
+_NUMBER_RE = re.compile(r'\b\d+\.?\d*\b')
+
 class PPTAssistant:
     def __init__(self, root):
         self.root = root
@@ -515,7 +520,6 @@ class PPTAssistant:
     def is_font_available(self, font_name):
         """Check if a font is available on the system."""
         try:
-            import tkinter.font as tkfont
             available_fonts = tkfont.families()
             return font_name in available_fonts
         except:
@@ -1034,15 +1038,8 @@ modify_text_in_textbox(
 
     def strip_ansi_codes(self, text):
         """Remove ANSI color codes and formatting from text."""
-        import re
-        # Pattern to match ANSI escape codes
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        # Also remove common color codes that might appear
-        color_codes = re.compile(r'\[[0-9;]*m')
-        
-        # Remove ANSI codes
-        text = ansi_escape.sub('', text)
-        text = color_codes.sub('', text)
+        # Remove ANSI codes (same precompiled patterns as the agent module)
+        text = ppt_smolagent.strip_ansi_codes(text)
         
         # Clean up extra whitespace and newlines
         lines = text.split('\n')
@@ -1063,7 +1060,6 @@ modify_text_in_textbox(
         cleaned_code = self.strip_ansi_codes(code_text)
         
         # Add modern header with better formatting
-        import datetime
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         header = f"# 🔧 Generated Code ({timestamp})\n# Click '▼ Generated Code' to collapse\n\n"
         
@@ -1085,20 +1081,15 @@ modify_text_in_textbox(
             line_start = f"{i+1}.0"
             line_end = f"{i+1}.end"
             
-            # Highlight Python keywords
-            keywords = ['def', 'import', 'from', 'if', 'else', 'elif', 'for', 'while', 'try', 'except', 'with', 'as', 'return', 'class', 'True', 'False', 'None']
-            for keyword in keywords:
-                import re
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                for match in re.finditer(pattern, line):
-                    start_idx = f"{i+1}.{match.start()}"
-                    end_idx = f"{i+1}.{match.end()}"
-                    self.code_display.tag_add("keyword", start_idx, end_idx)
+            # Highlight Python keywords (one pass for all keywords)
+            for match in _KEYWORD_RE.finditer(line):
+                start_idx = f"{i+1}.{match.start()}"
+                end_idx = f"{i+1}.{match.end()}"
+                self.code_display.tag_add("keyword", start_idx, end_idx)
             
             # Highlight strings
-            string_patterns = [r'"[^"]*"', r"'[^']*'"]
-            for pattern in string_patterns:
-                for match in re.finditer(pattern, line):
+            for string_re in _STRING_RES:
+                for match in string_re.finditer(line):
                     start_idx = f"{i+1}.{match.start()}"
                     end_idx = f"{i+1}.{match.end()}"
                     self.code_display.tag_add("string", start_idx, end_idx)
@@ -1111,8 +1102,7 @@ modify_text_in_textbox(
                     self.code_display.tag_add("comment", start_idx, line_end)
             
             # Highlight numbers
-            number_pattern = r'\b\d+\.?\d*\b'
-            for match in re.finditer(number_pattern, line):
+            for match in _NUMBER_RE.finditer(line):
                 start_idx = f"{i+1}.{match.start()}"
                 end_idx = f"{i+1}.{match.end()}"
                 self.code_display.tag_add("number", start_idx, end_idx)
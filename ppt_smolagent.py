@@ -4,8 +4,15 @@ import os
 import re
 from dotenv import load_dotenv
 import logging
+import logging.handlers
+import queue
 import io
-import sys
+import contextlib
+import collections
+import time
+import functools
+import itertools
+import threading
 import win32com.client
 import pythoncom
 
@@ -14,6 +21,9 @@ from lightning_slide_context_reader import LightningFastPowerPointSlideReader as
 # Load environment variables from .env file
 load_dotenv()
 
+# Diagnostics for the context/agent plumbing; debug messages are dropped unless logging is configured
+logger = logging.getLogger(__name__)
+
 # Initialize Phoenix tracing
 from phoenix_config import initialize_phoenix, trace_tool_call, add_trace_event, trace_function
 phoenix_initialized = initialize_phoenix()
@@ -22,11 +32,23 @@ if phoenix_initialized:
 else:
     print("⚠️  Phoenix tracing disabled (missing PHOENIX_API_KEY)")
 
+# Gate for non-error trace events on the hot path; set PPT_TRACE=0 to skip them even with Phoenix enabled.
+# Error events are always recorded.
+_TRACE_ENABLED = phoenix_initialized and os.getenv("PPT_TRACE", "1") == "1"
+
 # Set the OpenAI API key from environment
 openai_api_key = os.getenv("OPENAI_API_KEY")
 if not openai_api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
 
+# Retry budget for transient OpenAI errors on the direct vision API call
+VISION_API_MAX_RETRIES = 3
+
+# Circuit breaker for the vision path: after VISION_FAILURE_THRESHOLD consecutive failures
+# within VISION_FAILURE_WINDOW seconds, vision is skipped for the next VISION_FAILURE_WINDOW seconds
+VISION_FAILURE_THRESHOLD = 3
+VISION_FAILURE_WINDOW = 60
+
 # Define the model using OpenAIServerModel
 model = OpenAIServerModel(
     model_id="gpt-4o-mini",
@@ -35,7 +57,258 @@ model = OpenAIServerModel(
 )
 
 # Import HTML processing functions
-from html_processor import parse_html_text, process_html_lists, apply_html_formatting
+from html_processor import (
+    apply_compiled_formatting, parse_html_cached,
+    FMT_BOLD, FMT_ITALIC, FMT_UNDERLINE, FMT_STRIKE
+)
+
+# Fenced code blocks in model answers
+_CODE_BLOCK_RE = re.compile(r'```(?:python)?\n?(.*?)\n?```', re.DOTALL)
+
+# Code-like lines in captured stdout: function definitions (spanning lines),
+# import/from statements and assignments
+_STDOUT_CODE_RE = re.compile(
+    r'(?s:def\s+\w+.*?(?=\n\w|\n$))'
+    r'|(?:import|from)\s+\w+.*'
+    r'|\w+\s*=\s*.*',
+    re.MULTILINE
+)
+
+# First "Slide: ..." line of a slide context (for the debug print before each run)
+_SLIDE_LINE_RE = re.compile(r'^Slide:.*$', re.MULTILINE)
+
+# Inline HTML formatting tags (<b>, <i>, <u>, <s>, <span, <strong>, <em>) in a single pass
+_HTML_FORMAT_MARKER_RE = re.compile(r'<(?:[bius]>|span|strong>|em>)')
+
+# PowerPoint paragraph alignment values (ppAlignLeft, ppAlignCenter, ppAlignRight, ppAlignJustify)
+_ALIGNMENT_MAP = {
+    "left": 1,
+    "center": 2,
+    "right": 3,
+    "justify": 4
+}
+
+# Flag names accepted in the regex_flags argument of the text tools
+_REGEX_FLAG_NAMES = {
+    "IGNORECASE": re.IGNORECASE,
+    "MULTILINE": re.MULTILINE,
+    "DOTALL": re.DOTALL
+}
+
+@functools.lru_cache(maxsize=32)
+def _parse_regex_flags(regex_flags):
+    """Convert a flag string like "IGNORECASE|MULTILINE" to re flags."""
+    upper_flags = regex_flags.upper()
+    flags = 0
+    for name, flag in _REGEX_FLAG_NAMES.items():
+        if name in upper_flags:
+            flags |= flag
+    return flags
+
+@functools.lru_cache(maxsize=256)
+def _compile_regex(pattern, flags):
+    """Compile a user-supplied pattern once; agents often repeat the same find pattern."""
+    return re.compile(pattern, flags)
+
+# Regex metacharacters; a find pattern without any of them is a plain literal
+_REGEX_METACHARS = frozenset('.^$*+?{}[]\\|()')
+
+# Non-ASCII characters that re.IGNORECASE matches against ASCII letters (or that
+# change length when lowercased), which str.lower() based search can't mirror
+_CASEFOLD_SPECIAL_CHARS = ('\u0130', '\u0131', '\u017f', '\u212a')
+
+def _find_literal_spans(text, needle, ignore_case):
+    """
+    Find non-overlapping (start, end) spans of a literal pattern with str.find.
+    
+    Returns:
+        list or None: Spans in the same order re.finditer would give, or None when
+        the pattern isn't a literal or the result could differ from the regex engine
+    """
+    if any(c in _REGEX_METACHARS for c in needle):
+        return None
+    if ignore_case:
+        if not needle.isascii() or any(c in text for c in _CASEFOLD_SPECIAL_CHARS):
+            return None
+        text = text.lower()
+        needle = needle.lower()
+    
+    spans = []
+    step = len(needle)
+    start = text.find(needle)
+    while start != -1:
+        spans.append((start, start + step))
+        start = text.find(needle, start + step)
+    return spans
+
+def _truncate(text, limit):
+    """Shorten text to limit characters, marking the cut with '...'."""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+# Font size increase over the base size, indexed by header level (<h1>..<h3>; index 0 unused)
+_HEADER_SIZE_DELTA = (0, 8, 4, 2)
+
+def _apply_header_formatting(text_range, plain_text, list_info, font_size=None):
+    """Enlarge and bold the header lines recorded in list_info by process_html_lists."""
+    lines = plain_text.split('\n')
+    
+    # line index -> level for headers we format; later entries win as they did when applied in turn
+    header_levels = {}
+    for info in list_info:
+        if info['type'] == 'header' and 1 <= info['level'] <= 3 and info['line'] < len(lines):
+            header_levels[info['line']] = info['level']
+    if not header_levels:
+        return
+    
+    # 1-based start position of every line, computed once instead of re-summing per header
+    line_starts = list(itertools.accumulate((len(line) + 1 for line in lines), initial=1))
+    
+    # Coalesce runs of adjacent, non-empty header lines of the same level into one Characters() range
+    groups = []
+    for line_idx in sorted(header_levels):
+        level = header_levels[line_idx]
+        if not lines[line_idx]:
+            continue
+        if groups and groups[-1][1] == line_idx - 1 and groups[-1][2] == level:
+            groups[-1][1] = line_idx
+        else:
+            groups.append([line_idx, line_idx, level])
+    
+    base_size = font_size or 14
+    for first, last, level in groups:
+        try:
+            start = line_starts[first]
+            length = line_starts[last] + len(lines[last]) - start
+            header_range = text_range.Characters(start, length)
+            header_range.Font.Size = base_size + _HEADER_SIZE_DELTA[level]
+            header_range.Font.Bold = -1
+        except Exception as e:
+            print(f"Warning: Could not apply header formatting: {e}")
+
+def _apply_html(text_range, html_text, font_size=None):
+    """
+    Set the text of a TextRange from HTML: lists/headers, inline formatting, then header sizes.
+    
+    Returns:
+        str: The plain text that was written to the range
+    """
+    plain_text, format_segments, list_info = parse_html_cached(html_text)
+    apply_compiled_formatting(text_range, plain_text, format_segments)
+    _apply_header_formatting(text_range, plain_text, list_info, font_size)
+    return plain_text
+
+# Shape ID -> (slide index, shape index) for the active presentation, so
+# lookups by ID don't walk every shape on every slide over COM
+_shape_index = {}
+# (slide index, shape ID) -> shape index for lookups with a slide hint. IDs repeat across
+# slides, so hinted hits are kept apart from _shape_index, which must keep the first
+# occurrence that unhinted lookups have always resolved to
+_hinted_shape_index = {}
+_shape_index_owner = None
+
+def _invalidate_shape_index():
+    """Forget cached shape positions (call after shapes are added or removed)."""
+    _shape_index.clear()
+    _hinted_shape_index.clear()
+
+def _remember_shape_position(shape_id, slide_idx, shape_idx):
+    """Record where a just-created shape lives so the next lookup by ID is a cache hit."""
+    _shape_index.setdefault(shape_id, (slide_idx, shape_idx))
+    _hinted_shape_index[(slide_idx, shape_id)] = shape_idx
+
+def _find_shape(presentation, shape_id, slide_hint=None):
+    """
+    Find a shape by ID in the presentation, using the cached index when it is still valid.
+    
+    Args:
+        presentation: PowerPoint Presentation object
+        shape_id: ID of the shape to find
+        slide_hint: Optional 1-based slide index to search before scanning every slide
+    
+    Returns:
+        tuple: (slide, shape), or (None, None) if no shape has this ID
+    """
+    global _shape_index_owner
+    
+    owner = presentation.FullName
+    if owner != _shape_index_owner:
+        _invalidate_shape_index()
+        _shape_index_owner = owner
+    
+    # Fast path: validate the cached position with a single Id read. IDs are only unique
+    # per slide, so a hinted lookup only trusts positions on the hinted slide
+    if slide_hint is not None:
+        shape_idx = _hinted_shape_index.get((slide_hint, shape_id))
+        position = (slide_hint, shape_idx) if shape_idx is not None else _shape_index.get(shape_id)
+    else:
+        position = _shape_index.get(shape_id)
+    if position is not None and (slide_hint is None or position[0] == slide_hint):
+        try:
+            slide = presentation.Slides(position[0])
+            shape = slide.Shapes(position[1])
+            if shape.Id == shape_id:
+                return slide, shape
+        except Exception:
+            pass
+    
+    # Caller knows the slide: scan just that one before falling back to the whole deck
+    if slide_hint is not None:
+        try:
+            slide = presentation.Slides(slide_hint)
+            shapes = slide.Shapes
+            for shape_idx in range(1, shapes.Count + 1):
+                shape = shapes(shape_idx)
+                if shape.Id == shape_id:
+                    _hinted_shape_index[(slide_hint, shape_id)] = shape_idx
+                    return slide, shape
+        except Exception:
+            pass
+    
+    # Miss or stale entry: rebuild the index with one pass over the presentation.
+    # Indexed Item access with cached Counts is much cheaper over COM than _NewEnum iteration
+    _invalidate_shape_index()
+    found_slide = found_shape = None
+    slides = presentation.Slides
+    for slide_idx in range(1, slides.Count + 1):
+        slide = slides(slide_idx)
+        shapes = slide.Shapes
+        for shape_idx in range(1, shapes.Count + 1):
+            shape = shapes(shape_idx)
+            current_id = shape.Id
+            # Keep the first occurrence, matching the old linear search
+            if current_id not in _shape_index:
+                _shape_index[current_id] = (slide_idx, shape_idx)
+                if current_id == shape_id:
+                    found_slide, found_shape = slide, shape
+    
+    return found_slide, found_shape
+
+# Per-thread PowerPoint Application proxy; COM objects belong to the apartment
+# (thread) that created them, so each thread keeps its own
+_ppt_local = threading.local()
+
+def _get_ppt():
+    """
+    Return (ppt_app, presentation), reusing this thread's cached Application proxy.
+    
+    CoInitialize and GetActiveObject run once per thread. ActivePresentation is
+    read every call since the user can switch presentations; if the cached proxy
+    has died (PowerPoint restarted) it is dropped and reacquired once.
+    """
+    ppt_app = getattr(_ppt_local, 'app', None)
+    if ppt_app is not None:
+        try:
+            return ppt_app, ppt_app.ActivePresentation
+        except Exception:
+            _ppt_local.app = None
+    
+    if not getattr(_ppt_local, 'com_initialized', False):
+        pythoncom.CoInitialize()
+        _ppt_local.com_initialized = True
+    ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
+    presentation = ppt_app.ActivePresentation
+    _ppt_local.app = ppt_app
+    return ppt_app, presentation
 
 # Tool to add a textbox to a PowerPoint slide
 @tool
@@ -65,17 +338,15 @@ def add_textbox(slide_idx: int = 1, html_text: str = "<b>Sample Text</b>", left:
         text_align: Text alignment - "left", "center", or "right" (default: "left")
 
     Returns:
-        str: Confirmation message of the textbox addition
+        str: Confirmation message of the textbox addition, including the new textbox's ID
     """
     # Trace the tool call
     with trace_tool_call("add_textbox", slide_idx=slide_idx, html_text=html_text[:50], 
                         left=left, top=top, width=width, height=height):
-        pythoncom.CoInitialize()
-        
         try:
-            add_trace_event("powerpoint_connection", action="connecting_to_application")
-            ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-            presentation = ppt_app.ActivePresentation
+            if _TRACE_ENABLED:
+                add_trace_event("powerpoint_connection", action="connecting_to_application")
+            ppt_app, presentation = _get_ppt()
             
             # Add slide if needed
             if presentation.Slides.Count < slide_idx:
@@ -83,81 +354,41 @@ def add_textbox(slide_idx: int = 1, html_text: str = "<b>Sample Text</b>", left:
             else:
                 slide = presentation.Slides(slide_idx)
             
-            add_trace_event("html_processing", action="processing_html_content")
-            # Process HTML (always enabled now)
-            # First process lists and headers
-            processed_text, list_info = process_html_lists(html_text)
-            
-            # Then process inline formatting
-            plain_text, format_segments = parse_html_text(processed_text)
-            
             # Create the textbox
-            add_trace_event("textbox_creation", action="creating_textbox", slide=slide_idx)
+            if _TRACE_ENABLED:
+                add_trace_event("textbox_creation", action="creating_textbox", slide=slide_idx)
             box = slide.Shapes.AddTextbox(1, left, top, width, height)
             text_range = box.TextFrame.TextRange
             
-            # Apply HTML formatting
-            apply_html_formatting(text_range, plain_text, format_segments)
-            
-            # Apply header formatting
-            for info in list_info:
-                if info['type'] == 'header':
-                    try:
-                        # Calculate line position in the text
-                        lines = plain_text.split('\n')
-                        if info['line'] < len(lines):
-                            line_start = sum(len(lines[i]) + 1 for i in range(info['line'])) + 1
-                            line_length = len(lines[info['line']])
-                            
-                            if line_length > 0:
-                                header_range = text_range.Characters(line_start, line_length)
-                                
-                                # Apply header formatting based on level
-                                level = info['level']
-                                if level == 1:
-                                    header_range.Font.Size = (font_size or 14) + 8
-                                    header_range.Font.Bold = -1
-                                elif level == 2:
-                                    header_range.Font.Size = (font_size or 14) + 4
-                                    header_range.Font.Bold = -1
-                                elif level == 3:
-                                    header_range.Font.Size = (font_size or 14) + 2
-                                    header_range.Font.Bold = -1
-                    except Exception as e:
-                        print(f"Warning: Could not apply header formatting: {e}")
+            # Process HTML (always enabled now) and apply inline + header formatting
+            if _TRACE_ENABLED:
+                add_trace_event("html_processing", action="processing_html_content")
+            plain_text = _apply_html(text_range, html_text, font_size)
             
             # Apply global font settings (font_name and base font_size for non-headers)
             if font_name:
                 text_range.Font.Name = font_name
             
             # Set text alignment
-            alignment_map = {
-                "left": 1,
-                "center": 2, 
-                "right": 3
-            }
+            alignment = _ALIGNMENT_MAP.get(text_align.lower())
+            if alignment is not None:
+                text_range.ParagraphFormat.Alignment = alignment
             
-            if text_align.lower() in alignment_map:
-                text_range.ParagraphFormat.Alignment = alignment_map[text_align.lower()]
-            
-            # Clear slide context cache to ensure fresh context on next request
-            try:
-                from slide_context_reader import PowerPointSlideReader
-                reader = get_slide_reader()
-                if reader:
-                    reader.clear_context_cache()
-            except Exception as e:
-                pass  # Silently continue if cache clearing fails
+            # The new box is on top of the z-order, i.e. the last shape on the slide
+            box_id = box.Id
+            _remember_shape_position(box_id, slide_idx, slide.Shapes.Count)
+            _mark_slide_context_dirty()
             
-            add_trace_event("textbox_completed", success=True, text_length=len(plain_text))
-            return f"Textbox added to slide {slide_idx} with HTML formatting: {plain_text[:50]}{'...' if len(plain_text) > 50 else ''}"
+            if _TRACE_ENABLED:
+                add_trace_event("textbox_completed", success=True, text_length=len(plain_text))
+            return f"Textbox added to slide {slide_idx} (ID: {box_id}) with HTML formatting: {_truncate(plain_text, 50)}"
             
         except Exception as e:
             add_trace_event("textbox_error", error=str(e), error_type=type(e).__name__)
             return f"Error adding textbox: {str(e)}"
 
 @tool
-def replace_textbox_content(id: int, html_text: str, font_size: int = None, font_name: str = None, text_align: str = None) -> str:
+def replace_textbox_content(id: int, html_text: str, font_size: int = None, font_name: str = None, text_align: str = None, slide_hint: int = None) -> str:
     """
     COMPLETELY REPLACE all text content in a textbox with new HTML-formatted text.
     
@@ -181,6 +412,7 @@ def replace_textbox_content(id: int, html_text: str, font_size: int = None, font
         font_size: Base font size in points (headers will be larger)
         font_name: Font name for the text
         text_align: Text alignment - "left", "center", "right", or "justify"
+        slide_hint: Optional slide number (1-indexed) the textbox is on; speeds up finding it
     
     Returns:
         str: Confirmation message with details of what was updated
@@ -191,11 +423,12 @@ def replace_textbox_content(id: int, html_text: str, font_size: int = None, font
         text_operation="replace",
         font_size=font_size,
         font_name=font_name,
-        text_align=text_align
+        text_align=text_align,
+        slide_hint=slide_hint
     )
 
 @tool
-def modify_text_in_textbox(id: int, find_pattern: str, replacement_text: str, regex_flags: str = "IGNORECASE") -> str:
+def modify_text_in_textbox(id: int, find_pattern: str, replacement_text: str, regex_flags: str = "IGNORECASE", slide_hint: int = None) -> str:
     """
     Find and replace specific text patterns within a textbox while preserving all other text.
     
@@ -209,6 +442,7 @@ def modify_text_in_textbox(id: int, find_pattern: str, replacement_text: str, re
             Use HTML syntax like "<b>bold</b>", "<i>italic</i>", "<span style='color: red'>text</span>" etc.
             Set to empty string ("") to delete the matched text.
         regex_flags: Regex flags like "IGNORECASE" (default: "IGNORECASE")
+        slide_hint: Optional slide number (1-indexed) the textbox is on; speeds up finding it
     
     Returns:
         str: Confirmation message with details of what was replaced
@@ -217,11 +451,12 @@ def modify_text_in_textbox(id: int, find_pattern: str, replacement_text: str, re
         id=id,
         regex_finder=find_pattern,
         replacement_text=replacement_text,
-        regex_flags=regex_flags
+        regex_flags=regex_flags,
+        slide_hint=slide_hint
     )
 
 @tool
-def add_text_to_textbox(id: int, html_text: str, position: str = "end") -> str:
+def add_text_to_textbox(id: int, html_text: str, position: str = "end", slide_hint: int = None) -> str:
     """
     Add new text to the beginning or end of existing textbox content.
     
@@ -231,6 +466,7 @@ def add_text_to_textbox(id: int, html_text: str, position: str = "end") -> str:
         id: The ID of the textbox to modify
         html_text: HTML-formatted text to add
         position: Where to add the text - "start" (beginning) or "end" (default)
+        slide_hint: Optional slide number (1-indexed) the textbox is on; speeds up finding it
     
     Returns:
         str: Confirmation message with details of what was added
@@ -239,13 +475,14 @@ def add_text_to_textbox(id: int, html_text: str, position: str = "end") -> str:
     return _update_textbox_internal(
         id=id,
         html_text=html_text,
-        text_operation=operation
+        text_operation=operation,
+        slide_hint=slide_hint
     )
 
 @tool
 def format_textbox_style(id: int, font_size: int = None, font_name: str = None, text_align: str = None, 
                         line_spacing: float = None, left_margin: float = None, right_margin: float = None, 
-                        top_margin: float = None, bottom_margin: float = None) -> str:
+                        top_margin: float = None, bottom_margin: float = None, slide_hint: int = None) -> str:
     """
     Change the formatting and layout properties of a textbox without modifying text content.
     
@@ -261,6 +498,7 @@ def format_textbox_style(id: int, font_size: int = None, font_name: str = None,
         right_margin: Right margin in points
         top_margin: Top margin in points
         bottom_margin: Bottom margin in points
+        slide_hint: Optional slide number (1-indexed) the textbox is on; speeds up finding it
     
     Returns:
         str: Confirmation message with details of formatting changes
@@ -274,15 +512,14 @@ def format_textbox_style(id: int, font_size: int = None, font_name: str = None,
         left_margin=left_margin,
         right_margin=right_margin,
         top_margin=top_margin,
-        bottom_margin=bottom_margin
+        bottom_margin=bottom_margin,
+        slide_hint=slide_hint
     )
 
-def _update_textbox_internal(id: int, html_text: str = None, text_operation: str = "replace", regex_finder: str = None, replacement_text: str = None, regex_flags: str = "IGNORECASE", font_size: int = None, font_name: str = None, text_align: str = None, line_spacing: float = None, left_margin: float = None, right_margin: float = None, top_margin: float = None, bottom_margin: float = None) -> str:
+def _update_textbox_internal(id: int, html_text: str = None, text_operation: str = "replace", regex_finder: str = None, replacement_text: str = None, regex_flags: str = "IGNORECASE", font_size: int = None, font_name: str = None, text_align: str = None, line_spacing: float = None, left_margin: float = None, right_margin: float = None, top_margin: float = None, bottom_margin: float = None, slide_hint: int = None) -> str:
     """
     Internal implementation for textbox updates. Do not call directly.
     """
-    pythoncom.CoInitialize()
-    
     # INPUT VALIDATION: Prevent conflicting parameter combinations
     if html_text is not None and text_operation == "replace" and regex_finder is not None:
         return f"ERROR: Cannot use both 'html_text' with operation='replace' AND 'regex_finder'. Choose ONE approach:\n" \
@@ -293,21 +530,10 @@ def _update_textbox_internal(id: int, html_text: str = None, text_operation: str
         return f"ERROR: When using 'regex_finder', you must specify 'replacement_text' for the replacement."
     
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
+        ppt_app, presentation = _get_ppt()
         
         # Find the textbox by ID
-        target_shape = None
-        target_slide = None
-        
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    target_shape = shape
-                    target_slide = slide
-                    break
-            if target_shape:
-                break
+        target_slide, target_shape = _find_shape(presentation, id, slide_hint)
         
         if not target_shape:
             return f"Shape with ID {id} not found"
@@ -316,47 +542,27 @@ def _update_textbox_internal(id: int, html_text: str = None, text_operation: str
         if not hasattr(target_shape, 'TextFrame'):
             return f"Shape with ID {id} is not a textbox or doesn't support text"
         
-        if not target_shape.TextFrame.HasText and not html_text:
+        # Keep the TextFrame proxy in a local so each access below is one COM hop shorter
+        text_frame = target_shape.TextFrame
+        has_text = text_frame.HasText
+        
+        if not has_text and not html_text:
             return f"Shape with ID {id} has no text and no new text provided"
         
         updates_made = []
         
         # Handle text content updates
         if html_text is not None:
-            current_text = target_shape.TextFrame.TextRange.Text if target_shape.TextFrame.HasText else ""
+            # PowerPoint keeps a frame's full TextRange valid across Text assignments, so fetch it once
+            text_range = text_frame.TextRange
+            
+            # Only append/prepend need the existing text; skip marshaling it across COM for replace
+            if text_operation in ("append", "prepend"):
+                current_text = text_range.Text if has_text else ""
             
             if text_operation == "replace":
                 # Process HTML and apply formatting
-                processed_text, list_info = process_html_lists(html_text)
-                plain_text, format_segments = parse_html_text(processed_text)
-                apply_html_formatting(target_shape.TextFrame.TextRange, plain_text, format_segments)
-                
-                # Apply header formatting
-                for info in list_info:
-                    if info['type'] == 'header':
-                        try:
-                            # Calculate line position in the text
-                            lines = plain_text.split('\n')
-                            if info['line'] < len(lines):
-                                line_start = sum(len(lines[i]) + 1 for i in range(info['line'])) + 1
-                                line_length = len(lines[info['line']])
-                                
-                                if line_length > 0:
-                                    header_range = target_shape.TextFrame.TextRange.Characters(line_start, line_length)
-                                    
-                                    # Apply header formatting based on level
-                                    level = info['level']
-                                    if level == 1:
-                                        header_range.Font.Size = (font_size or 14) + 8
-                                        header_range.Font.Bold = -1
-                                    elif level == 2:
-                                        header_range.Font.Size = (font_size or 14) + 4
-                                        header_range.Font.Bold = -1
-                                    elif level == 3:
-                                        header_range.Font.Size = (font_size or 14) + 2
-                                        header_range.Font.Bold = -1
-                        except Exception as e:
-                            print(f"Warning: Could not apply header formatting: {e}")
+                _apply_html(text_range, html_text, font_size)
                 
                 updates_made.append(f"replaced text with HTML-formatted content")
                     
@@ -365,183 +571,114 @@ def _update_textbox_internal(id: int, html_text: str = None, text_operation: str
                 combined_text = current_text + html_text
                 
                 # Process the combined HTML text
-                processed_text, list_info = process_html_lists(combined_text)
-                plain_text, format_segments = parse_html_text(processed_text)
-                apply_html_formatting(target_shape.TextFrame.TextRange, plain_text, format_segments)
-                
-                # Apply header formatting if any headers are present
-                for info in list_info:
-                    if info['type'] == 'header':
-                        try:
-                            # Calculate line position in the text
-                            lines = plain_text.split('\n')
-                            if info['line'] < len(lines):
-                                line_start = sum(len(lines[i]) + 1 for i in range(info['line'])) + 1
-                                line_length = len(lines[info['line']])
-                                
-                                if line_length > 0:
-                                    header_range = target_shape.TextFrame.TextRange.Characters(line_start, line_length)
-                                    
-                                    # Apply header formatting based on level
-                                    level = info['level']
-                                    if level == 1:
-                                        header_range.Font.Size = (font_size or 14) + 8
-                                        header_range.Font.Bold = -1
-                                    elif level == 2:
-                                        header_range.Font.Size = (font_size or 14) + 4
-                                        header_range.Font.Bold = -1
-                                    elif level == 3:
-                                        header_range.Font.Size = (font_size or 14) + 2
-                                        header_range.Font.Bold = -1
-                        except Exception as e:
-                            print(f"Warning: Could not apply header formatting: {e}")
+                _apply_html(text_range, combined_text, font_size)
                 
-                updates_made.append(f"appended HTML-formatted text: '{html_text[:30]}{'...' if len(html_text) > 30 else ''}'")
+                updates_made.append(f"appended HTML-formatted text: '{_truncate(html_text, 30)}'")
                 
             elif text_operation == "prepend":
                 # For prepend, we need to process the combined text to apply HTML formatting
                 combined_text = html_text + current_text
                 
                 # Process the combined HTML text
-                processed_text, list_info = process_html_lists(combined_text)
-                plain_text, format_segments = parse_html_text(processed_text)
-                apply_html_formatting(target_shape.TextFrame.TextRange, plain_text, format_segments)
-                
-                # Apply header formatting if any headers are present
-                for info in list_info:
-                    if info['type'] == 'header':
-                        try:
-                            # Calculate line position in the text
-                            lines = plain_text.split('\n')
-                            if info['line'] < len(lines):
-                                line_start = sum(len(lines[i]) + 1 for i in range(info['line'])) + 1
-                                line_length = len(lines[info['line']])
-                                
-                                if line_length > 0:
-                                    header_range = target_shape.TextFrame.TextRange.Characters(line_start, line_length)
-                                    
-                                    # Apply header formatting based on level
-                                    level = info['level']
-                                    if level == 1:
-                                        header_range.Font.Size = (font_size or 14) + 8
-                                        header_range.Font.Bold = -1
-                                    elif level == 2:
-                                        header_range.Font.Size = (font_size or 14) + 4
-                                        header_range.Font.Bold = -1
-                                    elif level == 3:
-                                        header_range.Font.Size = (font_size or 14) + 2
-                                        header_range.Font.Bold = -1
-                        except Exception as e:
-                            print(f"Warning: Could not apply header formatting: {e}")
+                _apply_html(text_range, combined_text, font_size)
                 
-                updates_made.append(f"prepended HTML-formatted text: '{html_text[:30]}{'...' if len(html_text) > 30 else ''}'")
+                updates_made.append(f"prepended HTML-formatted text: '{_truncate(html_text, 30)}'")
+            
+            has_text = text_frame.HasText
         
         # Handle regex-based text replacement
         if regex_finder:
-            if not target_shape.TextFrame.HasText:
+            if not has_text:
                 return f"Cannot use regex on empty textbox {id}"
             
-            current_text = target_shape.TextFrame.TextRange.Text
+            text_range = text_frame.TextRange
+            current_text = text_range.Text
             
             # Parse regex flags
-            flags = 0
-            if "IGNORECASE" in regex_flags.upper():
-                flags |= re.IGNORECASE
-            if "MULTILINE" in regex_flags.upper():
-                flags |= re.MULTILINE
-            if "DOTALL" in regex_flags.upper():
-                flags |= re.DOTALL
+            flags = _parse_regex_flags(regex_flags)
             
             try:
-                # Find all matches in the original text
-                matches = list(re.finditer(regex_finder, current_text, flags))
+                # Find all matches in the original text; plain literals skip the regex engine
+                pattern = None
+                spans = _find_literal_spans(current_text, regex_finder, bool(flags & re.IGNORECASE))
+                if spans is None:
+                    pattern = _compile_regex(regex_finder, flags)
+                    spans = [match.span() for match in pattern.finditer(current_text)]
                 
-                if matches:
+                if spans:
                     if replacement_text is not None:
                         # Check if replacement contains HTML formatting
-                        if any(marker in replacement_text for marker in ['<b>', '<i>', '<u>', '<s>', '<span', '<strong>', '<em>']):
+                        if _HTML_FORMAT_MARKER_RE.search(replacement_text):
                             # Process HTML in replacement text to get clean text and formatting
-                            processed_replacement, _ = process_html_lists(replacement_text)
-                            plain_replacement, format_segments = parse_html_text(processed_replacement)
+                            # Segments come back compiled, so flags and colors are resolved once, not per match
+                            plain_replacement, segment_plan, _ = parse_html_cached(replacement_text)
                             
                             # CRITICAL FIX: Instead of replacing all text at once, replace each match individually
                             # This preserves existing formatting that was applied by previous calls
                             
                             # Process matches in reverse order to maintain position indices
-                            for match in reversed(matches):
-                                match_start = match.start()
-                                match_end = match.end()
+                            for match_start, match_end in reversed(spans):
                                 match_length = match_end - match_start
                                 
                                 # Replace this specific match in the textbox without affecting the rest
                                 if match_length > 0:
                                     # Get the character range for this match (1-based indexing in PowerPoint)
-                                    match_range = target_shape.TextFrame.TextRange.Characters(match_start + 1, match_length)
+                                    match_range = text_range.Characters(match_start + 1, match_length)
                                     
                                     # Replace the text in this range only
                                     match_range.Text = plain_replacement
+                                    # The write changes the text length; re-read the full range so the
+                                    # segment offsets below aren't clipped to the pre-write extent
+                                    text_range = text_frame.TextRange
                                     
                                     # Now apply formatting to the replacement text
                                     replacement_start_pos = match_start + 1  # 1-based for PowerPoint
                                     
-                                    for segment in format_segments:
+                                    for segment_start, segment_length, fmt_flags, color_rgb, _ in segment_plan:
+                                        # segment_start is 1-based relative to replacement start
+                                        absolute_start = replacement_start_pos + segment_start - 1
                                         try:
-                                            # Calculate absolute position within the replacement
-                                            # segment['start'] is 1-based relative to replacement start
-                                            absolute_start = replacement_start_pos + segment['start'] - 1
-                                            segment_length = segment['length']
+                                            # Get the character range for this formatting segment
+                                            char_range = text_range.Characters(absolute_start, segment_length)
                                             
-                                            if segment_length > 0:
-                                                # Get the character range for this formatting segment
-                                                char_range = target_shape.TextFrame.TextRange.Characters(absolute_start, segment_length)
-                                                
-                                                # Apply the specific formatting from this segment
-                                                formatting = segment['formatting']
-                                                if formatting.get('bold'):
-                                                    char_range.Font.Bold = -1
-                                                if formatting.get('italic'):
-                                                    char_range.Font.Italic = -1
-                                                if formatting.get('underline'):
-                                                    char_range.Font.Underline = -1
-                                                if formatting.get('strikethrough'):
-                                                    try:
-                                                        char_range.Font.Strike = -1
-                                                    except:
-                                                        pass
-                                                if formatting.get('color'):
-                                                    try:
-                                                        color_value = formatting['color']
-                                                        if color_value.startswith('#'):
-                                                            hex_color = color_value[1:]
-                                                            if len(hex_color) == 6:
-                                                                r = int(hex_color[0:2], 16)
-                                                                g = int(hex_color[2:4], 16) 
-                                                                b = int(hex_color[4:6], 16)
-                                                                rgb_color = r + (g * 256) + (b * 65536)
-                                                                char_range.Font.Color.RGB = rgb_color
-                                                        else:
-                                                            color_map = {
-                                                                'red': 255, 'blue': 16711680, 'green': 65280,
-                                                                'yellow': 65535, 'orange': 33023, 'purple': 8388736,
-                                                                'black': 0, 'white': 16777215
-                                                            }
-                                                            if color_value.lower() in color_map:
-                                                                char_range.Font.Color.RGB = color_map[color_value.lower()]
-                                                    except Exception as e:
-                                                        print(f"Warning: Could not apply color {color_value}: {e}")
+                                            # Apply the specific formatting from this segment
+                                            if fmt_flags & FMT_BOLD:
+                                                char_range.Font.Bold = -1
+                                            if fmt_flags & FMT_ITALIC:
+                                                char_range.Font.Italic = -1
+                                            if fmt_flags & FMT_UNDERLINE:
+                                                char_range.Font.Underline = -1
+                                            if fmt_flags & FMT_STRIKE:
+                                                try:
+                                                    char_range.Font.Strike = -1
+                                                except:
+                                                    pass
+                                            if color_rgb is not None:
+                                                try:
+                                                    char_range.Font.Color.RGB = color_rgb
+                                                except Exception as e:
+                                                    print(f"Warning: Could not apply color {color_rgb}: {e}")
                                                         
                                         except Exception as e:
                                             print(f"Warning: Could not format segment at position {absolute_start}: {e}")
-                                            
-                                    # Update the current_text to reflect the change for subsequent matches
-                                    # This is needed because we're processing in reverse order
-                                    current_text = target_shape.TextFrame.TextRange.Text
                         else:
                             # Simple text replacement without HTML formatting
-                            new_text = re.sub(regex_finder, replacement_text, current_text, flags=flags)
-                            target_shape.TextFrame.TextRange.Text = new_text
+                            if pattern is None and '\\' not in replacement_text:
+                                # Literal match and no group references: splice the spans directly
+                                pieces = []
+                                last_end = 0
+                                for match_start, match_end in spans:
+                                    pieces.append(current_text[last_end:match_start])
+                                    pieces.append(replacement_text)
+                                    last_end = match_end
+                                pieces.append(current_text[last_end:])
+                                new_text = ''.join(pieces)
+                            else:
+                                pattern = pattern or _compile_regex(regex_finder, flags)
+                                new_text = pattern.sub(replacement_text, current_text)
+                            text_range.Text = new_text
                         
-                        updates_made.append(f"replaced {len(matches)} regex matches with '{replacement_text}'")
+                        updates_made.append(f"replaced {len(spans)} regex matches with '{replacement_text}'")
                 else:
                     updates_made.append(f"no matches found for regex pattern '{regex_finder}'")
                     
@@ -549,8 +686,8 @@ def _update_textbox_internal(id: int, html_text: str = None, text_operation: str
                 return f"Invalid regex pattern '{regex_finder}': {str(e)}"
         
         # Apply global font settings that don't conflict with markdown
-        if target_shape.TextFrame.HasText:
-            text_range = target_shape.TextFrame.TextRange
+        if has_text:
+            text_range = text_frame.TextRange
             
             if font_name:
                 text_range.Font.Name = font_name
@@ -558,14 +695,9 @@ def _update_textbox_internal(id: int, html_text: str = None, text_operation: str
             
             # Apply paragraph formatting (these don't conflict with markdown)
             if text_align is not None:
-                alignment_map = {
-                    "left": 1,
-                    "center": 2,
-                    "right": 3,
-                    "justify": 4
-                }
-                if text_align.lower() in alignment_map:
-                    text_range.ParagraphFormat.Alignment = alignment_map[text_align.lower()]
+                alignment = _ALIGNMENT_MAP.get(text_align.lower())
+                if alignment is not None:
+                    text_range.ParagraphFormat.Alignment = alignment
                     updates_made.append(f"set text alignment to {text_align}")
             
             if line_spacing is not None:
@@ -575,29 +707,23 @@ def _update_textbox_internal(id: int, html_text: str = None, text_operation: str
         
         # Apply text margins (only to entire textbox)
         if left_margin is not None:
-            target_shape.TextFrame.MarginLeft = left_margin
+            text_frame.MarginLeft = left_margin
             updates_made.append(f"set left margin to {left_margin}")
         
         if right_margin is not None:
-            target_shape.TextFrame.MarginRight = right_margin
+            text_frame.MarginRight = right_margin
             updates_made.append(f"set right margin to {right_margin}")
         
         if top_margin is not None:
-            target_shape.TextFrame.MarginTop = top_margin
+            text_frame.MarginTop = top_margin
             updates_made.append(f"set top margin to {top_margin}")
         
         if bottom_margin is not None:
-            target_shape.TextFrame.MarginBottom = bottom_margin
+            text_frame.MarginBottom = bottom_margin
             updates_made.append(f"set bottom margin to {bottom_margin}")
         
-        # Clear slide context cache to ensure fresh context on next request
-        try:
-            from slide_context_reader import PowerPointSlideReader
-            reader = get_slide_reader()
-            if reader:
-                reader.clear_context_cache()
-        except Exception as e:
-            pass  # Silently continue if cache clearing fails
+        if updates_made:
+            _mark_slide_context_dirty()
         
         if updates_made:
             return f"Updated textbox {id} on slide {target_slide.SlideIndex}: {'; '.join(updates_made)}"
@@ -610,7 +736,7 @@ def _update_textbox_internal(id: int, html_text: str = None, text_operation: str
 # Universal object manipulation tools
 
 @tool
-def move_object(id: int, left: int, top: int) -> str:
+def move_object(id: int, left: int, top: int, slide_hint: int = None) -> str:
     """
     Move any object (textbox, shape, image, etc.) to new coordinates on the slide.
     
@@ -623,26 +749,25 @@ def move_object(id: int, left: int, top: int) -> str:
         id: The ID of the object to move
         left: Distance from left edge of slide in points (0-960 for standard slide)
         top: Distance from top edge of slide in points (0-540 for standard slide)
+        slide_hint: Optional slide number (1-indexed) the object is on, from the slide context; speeds up finding it
     
     Returns:
         str: Confirmation message with the object's new position
     """
-    pythoncom.CoInitialize()
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    shape.Left = left
-                    shape.Top = top
-                    return f"Moved object {id} to position ({left}, {top}) on slide {slide.SlideIndex}"
-        return f"Object with ID {id} not found"
+        ppt_app, presentation = _get_ppt()
+        slide, shape = _find_shape(presentation, id, slide_hint)
+        if not shape:
+            return f"Object with ID {id} not found"
+        shape.Left = left
+        shape.Top = top
+        _mark_slide_context_dirty()
+        return f"Moved object {id} to position ({left}, {top}) on slide {slide.SlideIndex}"
     except Exception as e:
         return f"Error moving object {id}: {str(e)}"
 
 @tool
-def resize_object(id: int, width: int, height: int) -> str:
+def resize_object(id: int, width: int, height: int, slide_hint: int = None) -> str:
     """
     Change the size of any object (textbox, shape, image, etc.) to new dimensions.
     
@@ -650,26 +775,25 @@ def resize_object(id: int, width: int, height: int) -> str:
         id: The ID of the object to resize
         width: New width in points
         height: New height in points
+        slide_hint: Optional slide number (1-indexed) the object is on, from the slide context; speeds up finding it
     
     Returns:
         str: Confirmation message with the object's new dimensions
     """
-    pythoncom.CoInitialize()
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    shape.Width = width
-                    shape.Height = height
-                    return f"Resized object {id} to {width}×{height} points on slide {slide.SlideIndex}"
-        return f"Object with ID {id} not found"
+        ppt_app, presentation = _get_ppt()
+        slide, shape = _find_shape(presentation, id, slide_hint)
+        if not shape:
+            return f"Object with ID {id} not found"
+        shape.Width = width
+        shape.Height = height
+        _mark_slide_context_dirty()
+        return f"Resized object {id} to {width}×{height} points on slide {slide.SlideIndex}"
     except Exception as e:
         return f"Error resizing object {id}: {str(e)}"
 
 @tool
-def position_and_resize_object(id: int, left: int, top: int, width: int, height: int) -> str:
+def position_and_resize_object(id: int, left: int, top: int, width: int, height: int, slide_hint: int = None) -> str:
     """
     Move and resize an object in a single operation for precise positioning.
     
@@ -681,29 +805,30 @@ def position_and_resize_object(id: int, left: int, top: int, width: int, height:
         top: Distance from top edge of slide in points
         width: New width in points
         height: New height in points
+        slide_hint: Optional slide number (1-indexed) the object is on, from the slide context; speeds up finding it
     
     Returns:
         str: Confirmation message with the object's new position and size
     """
-    pythoncom.CoInitialize()
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    shape.Left = left
-                    shape.Top = top
-                    shape.Width = width
-                    shape.Height = height
-                    return f"Positioned object {id} at ({left}, {top}) with size {width}×{height} on slide {slide.SlideIndex}"
-        return f"Object with ID {id} not found"
+        ppt_app, presentation = _get_ppt()
+        slide, shape = _find_shape(presentation, id, slide_hint)
+        if not shape:
+            return f"Object with ID {id} not found"
+        # Shape has no multi-property setter; four property puts on the one cached
+        # proxy is the minimum (a ShapeRange would add Range()/array marshalling on top)
+        shape.Left = left
+        shape.Top = top
+        shape.Width = width
+        shape.Height = height
+        _mark_slide_context_dirty()
+        return f"Positioned object {id} at ({left}, {top}) with size {width}×{height} on slide {slide.SlideIndex}"
     except Exception as e:
         return f"Error positioning object {id}: {str(e)}"
 
 
 @tool
-def get_object_properties(id: int) -> dict:
+def get_object_properties(id: int, slide_hint: int = None) -> dict:
     """
     Get detailed information about any object on the slide.
     
@@ -712,58 +837,62 @@ def get_object_properties(id: int) -> dict:
 
     Args:
         id: The ID of the object to inspect
+        slide_hint: Optional slide number (1-indexed) the object is on, from the slide context; speeds up finding it
 
     Returns:
         dict: Object properties including slide, position, size, type, and content details
     """
-    pythoncom.CoInitialize()
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    props = {
-                        "slide": slide.SlideIndex,
-                        "id": shape.Id,
-                        "name": shape.Name,
-                        "left": shape.Left,
-                        "top": shape.Top,
-                        "width": shape.Width,
-                        "height": shape.Height,
-                        "rotation": shape.Rotation,
-                        "type": shape.Type,
-                        "type_name": _get_shape_type_name(shape.Type)
-                    }
-                    
-                    # Add text content if it's a text-containing shape
-                    if hasattr(shape, 'TextFrame') and shape.TextFrame.HasText:
-                        props["text_content"] = shape.TextFrame.TextRange.Text[:100] + "..." if len(shape.TextFrame.TextRange.Text) > 100 else shape.TextFrame.TextRange.Text
-                    
-                    return props
-        return {"error": f"Object with ID {id} not found"}
+        ppt_app, presentation = _get_ppt()
+        slide, shape = _find_shape(presentation, id, slide_hint)
+        if not shape:
+            return {"error": f"Object with ID {id} not found"}
+        
+        shape_type = shape.Type
+        props = {
+            "slide": slide.SlideIndex,
+            # _find_shape matched on this ID, so no need to read it back over COM
+            "id": id,
+            "name": shape.Name,
+            "left": shape.Left,
+            "top": shape.Top,
+            "width": shape.Width,
+            "height": shape.Height,
+            "rotation": shape.Rotation,
+            "type": shape_type,
+            "type_name": _get_shape_type_name(shape_type)
+        }
+        
+        # Add text content if it's a text-containing shape. HasTextFrame is a plain
+        # property read, unlike hasattr(), which fetches the whole TextFrame object
+        try:
+            if shape.HasTextFrame:
+                text_frame = shape.TextFrame
+                if text_frame.HasText:
+                    text = text_frame.TextRange.Text
+                    props["text_content"] = _truncate(text, 100)
+        except Exception:
+            pass
+        
+        return props
     except Exception as e:
         return {"error": f"Error inspecting object {id}: {str(e)}"}
 
+# Readable shape type names indexed by PowerPoint shape type number (None = unnamed)
+_SHAPE_TYPE_NAMES = (
+    None, "AutoShape", None, None, None, "Freeform", None, None, None, "Group",
+    None, "Picture", "OLEObject", "Chart", "Table", "Media", None, "TextBox",
+    "Content", "SmartArt"
+)
+
 def _get_shape_type_name(shape_type: int) -> str:
     """Convert PowerPoint shape type number to readable name."""
-    type_map = {
-        1: "AutoShape",
-        5: "Freeform", 
-        9: "Group",
-        11: "Picture",
-        12: "OLEObject",
-        13: "Chart",
-        14: "Table",
-        15: "Media",
-        17: "TextBox",
-        18: "Content",
-        19: "SmartArt"
-    }
-    return type_map.get(shape_type, f"Unknown({shape_type})")
+    if 0 <= shape_type < len(_SHAPE_TYPE_NAMES) and _SHAPE_TYPE_NAMES[shape_type]:
+        return _SHAPE_TYPE_NAMES[shape_type]
+    return f"Unknown({shape_type})"
 
 @tool
-def copy_object_to_slide(id: int, target_slide_idx: int, new_left: int = None, new_top: int = None) -> int:
+def copy_object_to_slide(id: int, target_slide_idx: int, new_left: int = None, new_top: int = None, slide_hint: int = None) -> int:
     """
     Copy an object to another slide, optionally positioning it at specific coordinates.
     
@@ -774,28 +903,33 @@ def copy_object_to_slide(id: int, target_slide_idx: int, new_left: int = None, n
         target_slide_idx: Slide number to copy the object to (1-indexed)
         new_left: Optional new left position for the copy (preserves original position if not specified)
         new_top: Optional new top position for the copy (preserves original position if not specified)
+        slide_hint: Optional slide number (1-indexed) the object is on, from the slide context; speeds up finding it
     
     Returns:
         int: The ID of the newly created copy, or -1 if operation failed
     """
-    pythoncom.CoInitialize()
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
+        ppt_app, presentation = _get_ppt()
         
         # Find source object
-        source_shape = None
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    source_shape = shape
-                    break
-            if source_shape:
-                break
+        source_slide, source_shape = _find_shape(presentation, id, slide_hint)
         
         if not source_shape:
             return -1
         
+        if source_slide.SlideIndex == target_slide_idx:
+            # Same slide: Duplicate() avoids the clipboard round-trip entirely.
+            # It offsets the copy, so put it back on the original position unless told otherwise
+            target_slide = source_slide
+            new_shape = source_shape.Duplicate()(1)
+            new_id = new_shape.Id
+            new_shape.Left = source_shape.Left if new_left is None else new_left
+            new_shape.Top = source_shape.Top if new_top is None else new_top
+            
+            _remember_shape_position(new_id, target_slide_idx, target_slide.Shapes.Count)
+            _mark_slide_context_dirty()
+            return new_id
+        
         # Create target slide if needed
         if presentation.Slides.Count < target_slide_idx:
             target_slide = presentation.Slides.Add(target_slide_idx, 12)  # 12 = ppLayoutBlank
@@ -816,6 +950,9 @@ def copy_object_to_slide(id: int, target_slide_idx: int, new_left: int = None, n
             if new_top is not None:
                 new_shape.Top = new_top
             
+            # Pasted shapes land on top of the z-order, i.e. last on the slide
+            _remember_shape_position(new_id, target_slide_idx, target_slide.Shapes.Count)
+            _mark_slide_context_dirty()
             return new_id
         else:
             return -1
@@ -825,7 +962,7 @@ def copy_object_to_slide(id: int, target_slide_idx: int, new_left: int = None, n
         return -1
 
 @tool
-def duplicate_object_on_same_slide(id: int, offset_left: int = 20, offset_top: int = 20) -> int:
+def duplicate_object_on_same_slide(id: int, offset_left: int = 20, offset_top: int = 20, slide_hint: int = None) -> int:
     """
     Create a duplicate of an object on the same slide with a slight position offset.
     
@@ -835,45 +972,37 @@ def duplicate_object_on_same_slide(id: int, offset_left: int = 20, offset_top: i
         id: The ID of the object to duplicate
         offset_left: How many points to move the duplicate to the right (default: 20)
         offset_top: How many points to move the duplicate down (default: 20)
+        slide_hint: Optional slide number (1-indexed) the object is on, from the slide context; speeds up finding it
     
     Returns:
         int: The ID of the newly created duplicate, or -1 if operation failed
     """
-    pythoncom.CoInitialize()
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
+        ppt_app, presentation = _get_ppt()
         
         # Find source object
-        source_shape = None
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    source_shape = shape
-                    break
-            if source_shape:
-                break
+        source_slide, source_shape = _find_shape(presentation, id, slide_hint)
         
         if not source_shape:
             return -1
         
-        # Duplicate on same slide
-        dup = source_shape.Duplicate()
-        if dup and dup.Count > 0:
-            new_shape = dup[0]
-            # Offset the position slightly
-            new_shape.Left = source_shape.Left + offset_left
-            new_shape.Top = source_shape.Top + offset_top
-            return new_shape.Id
-        else:
-            return -1
+        # Duplicate on same slide; duplicating one shape always yields a one-item ShapeRange
+        new_shape = source_shape.Duplicate()(1)
+        # Offset the position slightly
+        new_shape.Left = source_shape.Left + offset_left
+        new_shape.Top = source_shape.Top + offset_top
+        new_id = new_shape.Id
+        # Duplicates land on top of the z-order, i.e. last on the slide
+        _remember_shape_position(new_id, source_slide.SlideIndex, source_slide.Shapes.Count)
+        _mark_slide_context_dirty()
+        return new_id
             
     except Exception as e:
         print(f"Error duplicating object {id}: {str(e)}")
         return -1
 
 @tool
-def delete_object(id: int) -> str:
+def delete_object(id: int, slide_hint: int = None) -> str:
     """
     Permanently delete an object from the slide.
     
@@ -881,34 +1010,105 @@ def delete_object(id: int) -> str:
     
     Args:
         id: The ID of the object to delete
+        slide_hint: Optional slide number (1-indexed) the object is on, from the slide context; speeds up finding it
     
     Returns:
         str: Confirmation message of deletion
     """
-    pythoncom.CoInitialize()
     try:
-        ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
-        presentation = ppt_app.ActivePresentation
-        for slide in presentation.Slides:
-            for shape in slide.Shapes:
-                if shape.Id == id:
-                    shape_name = shape.Name
-                    slide_num = slide.SlideIndex
-                    shape.Delete()
-                    
-                    # Clear slide context cache after deletion
-                    try:
-                        reader = get_slide_reader()
-                        if reader:
-                            reader.clear_context_cache()
-                    except Exception:
-                        pass
-                    
-                    return f"Deleted object '{shape_name}' (ID: {id}) from slide {slide_num}"
-        return f"Object with ID {id} not found"
+        ppt_app, presentation = _get_ppt()
+        slide, shape = _find_shape(presentation, id, slide_hint)
+        if not shape:
+            return f"Object with ID {id} not found"
+        
+        shape_name = shape.Name
+        slide_num = slide.SlideIndex
+        shape.Delete()
+        # Shapes after the deleted one move down a position
+        _invalidate_shape_index()
+        _mark_slide_context_dirty()
+        
+        return f"Deleted object '{shape_name}' (ID: {id}) from slide {slide_num}"
     except Exception as e:
         return f"Error deleting object {id}: {str(e)}"
 
+def _bulk_move(shape, op):
+    shape.Left = op['left']
+    shape.Top = op['top']
+    return f"moved to ({op['left']}, {op['top']})"
+
+def _bulk_resize(shape, op):
+    shape.Width = op['width']
+    shape.Height = op['height']
+    return f"resized to {op['width']}×{op['height']}"
+
+def _bulk_position_and_resize(shape, op):
+    return f"{_bulk_move(shape, op)}, {_bulk_resize(shape, op)}"
+
+def _bulk_delete(shape, op):
+    shape.Delete()
+    # Shapes after the deleted one move down a position
+    _invalidate_shape_index()
+    return "deleted"
+
+# op name -> handler(shape, op) returning a short description of what was done
+_BULK_SHAPE_OPS = {
+    "move": _bulk_move,
+    "resize": _bulk_resize,
+    "position_and_resize": _bulk_position_and_resize,
+    "delete": _bulk_delete
+}
+
+@tool
+def bulk_shape_ops(ops: list) -> str:
+    """
+    Apply several move/resize/delete operations to objects in a single call.
+    
+    Prefer this over calling move_object, resize_object, position_and_resize_object or
+    delete_object repeatedly when two or more objects need changing.
+    
+    Args:
+        ops: List of operation dicts, applied in order. Each has an "op" and an "id":
+            {"op": "move", "id": 5, "left": 100, "top": 50}
+            {"op": "resize", "id": 5, "width": 300, "height": 80}
+            {"op": "position_and_resize", "id": 5, "left": 100, "top": 50, "width": 300, "height": 80}
+            {"op": "delete", "id": 7}
+            Any op may also carry "slide_hint": the slide number the object is on.
+    
+    Returns:
+        str: One result line per operation
+    """
+    try:
+        ppt_app, presentation = _get_ppt()
+    except Exception as e:
+        return f"Error connecting to PowerPoint: {str(e)}"
+    
+    results = []
+    changed = False
+    for index, op in enumerate(ops, 1):
+        try:
+            handler = _BULK_SHAPE_OPS.get(op.get('op'))
+            if handler is None:
+                results.append(f"{index}. Unknown op '{op.get('op')}' (use one of: {', '.join(_BULK_SHAPE_OPS)})")
+                continue
+            
+            slide, shape = _find_shape(presentation, op['id'], op.get('slide_hint'))
+            if not shape:
+                results.append(f"{index}. Object with ID {op['id']} not found")
+                continue
+            
+            slide_num = slide.SlideIndex
+            results.append(f"{index}. Object {op['id']} on slide {slide_num}: {handler(shape, op)}")
+            changed = True
+        except Exception as e:
+            results.append(f"{index}. Error applying {op}: {str(e)}")
+    
+    # Invalidate the slide context once for the whole batch
+    if changed:
+        _mark_slide_context_dirty()
+    
+    return "\n".join(results) if results else "No operations given"
+
 # The tool is automatically registered when using the @tool decorator
 
 instructions = """
@@ -933,48 +1133,114 @@ USE THIS CONTEXT in your THOUGHT process to make informed decisions about positi
 
 ⚠️ CRITICAL RULES:
 - ALWAYS use object IDs from slide context for reliable reference
+- Pass slide_hint (the slide number from the context) to tools that take an object ID
 - Choose the most specific tool for each task
 - Consider existing content positioning when adding new elements
 - Match existing fonts/styles when appropriate for consistency
 - **LEVERAGE MULTI-TOOL ACTIONS**: Use multiple tools together when they accomplish related goals efficiently
+- When moving, resizing or deleting 2 or more objects, use ONE bulk_shape_ops call instead of separate tool calls
 
 Remember: Only modify slides when the user specifically requests changes.
 """
 
 # Create a custom logging handler to capture code generation
 class CodeCaptureHandler(logging.Handler):
+    # Upper bound on records kept per request so long verbose runs can't grow without limit
+    MAX_CAPTURED_RECORDS = 4096
+    
     def __init__(self):
         super().__init__()
-        self.captured_code = []
+        self.captured_code = collections.deque(maxlen=self.MAX_CAPTURED_RECORDS)
         
+    # Same substrings as before ('def ', 'import ', ...), matched in one scan
+    _CODE_KEYWORD_RE = re.compile(r'(?:def|import|from|class|with|for|if) ')
+    
     def emit(self, record):
-        if hasattr(record, 'msg'):
-            msg = str(record.msg)
-            # Look for code patterns in the log messages
-            if any(keyword in msg for keyword in ['def ', 'import ', 'from ', 'class ', 'with ', 'for ', 'if ']):
-                self.captured_code.append(msg)
+        msg = record.msg
+        if not isinstance(msg, str):
+            msg = str(msg)
+        # Look for code patterns in the log messages
+        # The agent often logs the same code block several times in a row; keep one copy
+        if self._CODE_KEYWORD_RE.search(msg) and (not self.captured_code or self.captured_code[-1] != msg):
+            self.captured_code.append(msg)
     
     def get_code(self):
         return '\n'.join(self.captured_code)
     
     def clear(self):
-        self.captured_code = []
+        # Reuse the same deque instead of allocating a new one per request
+        self.captured_code.clear()
 
 # Global code capture handler
 code_capture_handler = CodeCaptureHandler()
 
-# Global slide context reader instance
-slide_reader = None
+class _RawRecordQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that enqueues records as-is.
+
+    The default prepare() formats the message (and any traceback) and copies the record on
+    the calling thread. CodeCaptureHandler only reads record.msg, so none of that is needed,
+    and replacing msg with the formatted text would let traceback lines leak into the
+    captured code.
+    """
+
+    def prepare(self, record):
+        return record
+
+# Log records are only enqueued on the request thread; a background listener
+# drains them into code_capture_handler so the keyword matching happens off the hot path
+_capture_queue = queue.SimpleQueue()
+_capture_queue_handler = _RawRecordQueueHandler(_capture_queue)
+_capture_listener = logging.handlers.QueueListener(_capture_queue, code_capture_handler)
+
+def _start_code_capture():
+    """Attach the queue handler to the root logger and start draining. Returns the previous root level."""
+    code_capture_handler.clear()
+    _capture_listener.start()
+    root_logger = logging.getLogger()
+    previous_level = root_logger.level
+    root_logger.addHandler(_capture_queue_handler)
+    root_logger.setLevel(logging.DEBUG)
+    return previous_level
+
+def _stop_code_capture(previous_level):
+    """Detach the queue handler, restore the root level and wait until every queued record is drained."""
+    root_logger = logging.getLogger()
+    root_logger.removeHandler(_capture_queue_handler)
+    root_logger.setLevel(previous_level)
+    # stop() enqueues a sentinel and joins the listener thread
+    _capture_listener.stop()
+
+# Slide context reader per thread: the reader holds COM proxies, which belong to the
+# thread (apartment) that created them, and concurrent callers must not share its cache
+_slide_reader_local = threading.local()
+
+# Set by mutating tools instead of clearing the reader cache per call; consumed once at the
+# turn boundary (end-of-run refresh or the next get_current_slide_context) so a batch of
+# edits costs one slide re-read
+_slide_context_dirty = False
+
+def _mark_slide_context_dirty():
+    """Record that a tool changed the presentation."""
+    global _slide_context_dirty
+    _slide_context_dirty = True
+
+def _take_slide_context_dirty():
+    """Return whether a tool changed the presentation since the last call, and reset the flag."""
+    global _slide_context_dirty
+    dirty = _slide_context_dirty
+    _slide_context_dirty = False
+    return dirty
 
 def get_slide_reader():
-    """Get or create the global slide reader instance."""
-    global slide_reader
+    """Get or create the slide reader instance for the current thread."""
+    slide_reader = getattr(_slide_reader_local, 'reader', None)
     if slide_reader is None:
         try:
             slide_reader = PowerPointSlideReader()
-            print("🚀 Slide reader initialized with original HTML conversion")
+            _slide_reader_local.reader = slide_reader
+            logger.debug("Slide reader initialized")
         except Exception as e:
-            print(f"Warning: Could not initialize slide reader: {e}")
+            logger.warning("Could not initialize slide reader: %s", e)
             slide_reader = None
     return slide_reader
 
@@ -985,7 +1251,8 @@ def get_current_slide_context(force_refresh=False):
         if reader and reader.ppt_app:
             # Force refresh of context by clearing cached values
             # This ensures we always get the latest slide when user switches
-            if force_refresh:
+            # or when tools have changed the presentation since the last read
+            if force_refresh or _take_slide_context_dirty():
                 context = reader.force_refresh_context()
             else:
                 context = reader.get_current_context()
@@ -1068,9 +1335,9 @@ def clear_slide_context_cache():
         reader = get_slide_reader()
         if reader:
             reader.clear_context_cache()
-            print("🗑️ Slide context cache cleared")
+            logger.debug("Slide context cache cleared")
     except Exception as e:
-        print(f"⚠️ Warning: Could not clear context cache: {e}")
+        logger.warning("Could not clear context cache: %s", e)
 
 agent = CodeAgent(
     tools=[
@@ -1085,7 +1352,8 @@ agent = CodeAgent(
         get_object_properties,
         copy_object_to_slide,
         duplicate_object_on_same_slide,
-        delete_object
+        delete_object,
+        bulk_shape_ops
     ],
     instructions=instructions,
     max_steps=2,
@@ -1093,19 +1361,52 @@ agent = CodeAgent(
     verbosity_level=LogLevel.DEBUG
 )
 
+def _has_content(text):
+    """Return True if text contains any non-whitespace character (without copying it like strip())."""
+    return bool(text) and not text.isspace()
+
+# Pattern to match ANSI escape codes
+_ANSI_ESCAPE_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+# Also remove common color codes that might appear
+_COLOR_CODES_RE = re.compile(r'\[[0-9;]*m')
+
 def strip_ansi_codes(text):
     """Remove ANSI color codes and formatting from text."""
-    import re
-    # Pattern to match ANSI escape codes
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    # Also remove common color codes that might appear
-    color_codes = re.compile(r'\[[0-9;]*m')
+    # Text without an escape character or '[' cannot match either pattern
+    if '\x1b' not in text and '[' not in text:
+        return text
+    return _COLOR_CODES_RE.sub('', _ANSI_ESCAPE_RE.sub('', text))
+
+class _BoundedCapture(io.TextIOBase):
+    """
+    Write-only text stream for redirect_stdout/redirect_stderr that strips ANSI codes
+    as text arrives and stops keeping output once max_chars is reached.
+    """
+    
+    def __init__(self, max_chars=256 * 1024):
+        super().__init__()
+        self._chunks = []
+        self._size = 0
+        self._max_chars = max_chars
+        self.truncated = False
     
-    # Remove ANSI codes
-    text = ansi_escape.sub('', text)
-    text = color_codes.sub('', text)
+    def writable(self):
+        return True
     
-    return text
+    def write(self, text):
+        if self._size < self._max_chars:
+            cleaned = strip_ansi_codes(text)
+            self._chunks.append(cleaned)
+            self._size += len(cleaned)
+        else:
+            self.truncated = True
+        return len(text)
+    
+    def getvalue(self):
+        value = ''.join(self._chunks)
+        if self.truncated:
+            value += "\n... [output truncated]"
+        return value
 
 def run_agent_with_code_capture(message):
     """
@@ -1118,17 +1419,21 @@ def run_agent_with_code_capture(message):
     # Trace the entire agent interaction
     with trace_tool_call("agent_interaction", user_message=message[:100]):
         try:
-            add_trace_event("agent_start", user_message=message)
+            if _TRACE_ENABLED:
+                add_trace_event("agent_start", user_message=message)
             
             # Get current slide context
-            add_trace_event("context_retrieval", action="getting_slide_context")
+            if _TRACE_ENABLED:
+                add_trace_event("context_retrieval", action="getting_slide_context")
+            reader = get_slide_reader()
+            # Re-reads automatically if tools were run outside an agent request (e.g. from the debug console)
             slide_context = get_current_slide_context()
             
-            # Debug: Print current slide info (you can remove this later)
-            if "Slide:" in slide_context:
-                slide_line = [line for line in slide_context.split('\n') if line.startswith('Slide:')]
+            # Debug: Log current slide info
+            if logger.isEnabledFor(logging.DEBUG):
+                slide_line = _SLIDE_LINE_RE.search(slide_context)
                 if slide_line:
-                    print(f"🎯 Current slide context: {slide_line[0]}")
+                    logger.debug("Current slide context: %s", slide_line.group(0))
             
             # Enhance the message with slide context
             enhanced_message = f"""CURRENT SLIDE CONTEXT:
@@ -1138,88 +1443,68 @@ USER REQUEST:
 {message}
 """
             
-            # Clear previous captured code
-            code_capture_handler.clear()
-            
-            # Set up logging to capture the agent's output
-            logger = logging.getLogger()
-            logger.addHandler(code_capture_handler)
-            logger.setLevel(logging.DEBUG)
+            # Clear previous captured code and set up logging to capture the agent's output
+            previous_log_level = _start_code_capture()
             
             # Capture stdout/stderr as well
-            stdout_backup = sys.stdout
-            stderr_backup = sys.stderr
-            stdout_capture = io.StringIO()
-            stderr_capture = io.StringIO()
+            stdout_capture = _BoundedCapture()
+            stderr_capture = _BoundedCapture()
             
             try:
-                sys.stdout = stdout_capture
-                sys.stderr = stderr_capture
-                
-                # Run the agent with enhanced message
-                add_trace_event("agent_execution", action="running_smolagent", enhanced_message_length=len(enhanced_message))
-                answer = agent.run(enhanced_message)
-                add_trace_event("agent_response", answer_length=len(answer) if answer else 0)
+                with contextlib.redirect_stdout(stdout_capture), contextlib.redirect_stderr(stderr_capture):
+                    # Run the agent with enhanced message
+                    if _TRACE_ENABLED:
+                        add_trace_event("agent_execution", action="running_smolagent", enhanced_message_length=len(enhanced_message))
+                    answer = agent.run(enhanced_message)
+                    if _TRACE_ENABLED:
+                        add_trace_event("agent_response", answer_length=len(answer) if answer else 0)
                 
             finally:
-                # Restore stdout/stderr
-                sys.stdout = stdout_backup
-                sys.stderr = stderr_backup
-                logger.removeHandler(code_capture_handler)
+                _stop_code_capture(previous_log_level)
             
-            # Get captured outputs and clean them
-            stdout_content = strip_ansi_codes(stdout_capture.getvalue())
-            stderr_content = strip_ansi_codes(stderr_capture.getvalue())
+            # Get captured outputs (stdout/stderr were cleaned as they were written) and clean the rest
+            stdout_content = stdout_capture.getvalue()
+            stderr_content = stderr_capture.getvalue()
             captured_code = strip_ansi_codes(code_capture_handler.get_code())
+            stripped_answer = strip_ansi_codes(str(answer) if answer else "")
             
             # IMPORTANT: Force refresh the slide context after agent execution
-            # This ensures that any objects added/deleted by the agent are reflected in the context
+            # This ensures that any objects added/deleted by the agent are reflected in the context.
+            # Read-only requests leave the dirty flag unset and skip the COM traversal.
             try:
-                add_trace_event("context_refresh", action="refreshing_slide_context")
-                reader = get_slide_reader()
-                if reader and reader.ppt_app:
+                if _TRACE_ENABLED:
+                    add_trace_event("context_refresh", action="refreshing_slide_context")
+                if _take_slide_context_dirty() and reader and reader.ppt_app:
                     # Force refresh the context to reflect any changes made by the agent
                     updated_context = reader.force_refresh_context()
-                    print("✅ Slide context refreshed after agent execution")
+                    logger.debug("Slide context refreshed after agent execution")
                 else:
                     updated_context = slide_context
             except Exception as e:
-                print(f"⚠️ Warning: Could not refresh context after execution: {e}")
+                logger.warning("Could not refresh context after execution: %s", e)
                 updated_context = slide_context
             
             # Try to extract code from various sources
             generated_code = ""
             
             # First, try the captured code from logs
-            if captured_code.strip():
+            if _has_content(captured_code):
                 generated_code = captured_code
             
             # Next, try to extract from stdout
             elif stdout_content:
-                # Look for code patterns in stdout
-                import re
-                
-                # Look for function definitions and imports
-                code_patterns = [
-                    r'(def\s+\w+.*?(?=\n\w|\n$))',  # Function definitions
-                    r'(import\s+\w+.*)',  # Import statements
-                    r'(from\s+\w+.*)',  # From imports
-                    r'(\w+\s*=\s*.*)',  # Assignments
-                ]
-                
-                for pattern in code_patterns:
-                    matches = re.findall(pattern, stdout_content, re.MULTILINE | re.DOTALL)
-                    if matches:
-                        generated_code += '\n'.join(matches) + '\n'
+                # Look for code patterns in stdout, in one pass over the buffer
+                matches = [match.group(0) for match in _STDOUT_CODE_RE.finditer(stdout_content)]
+                if matches:
+                    generated_code = '\n'.join(matches) + '\n'
             
             # If still no code, try to extract from the answer itself
-            if not generated_code.strip():
-                import re
+            if not _has_content(generated_code):
                 # Clean the answer first
-                clean_answer = strip_ansi_codes(answer)
+                clean_answer = stripped_answer
                 
-                # Look for code blocks in the answer
-                code_blocks = re.findall(r'```(?:python)?\n?(.*?)\n?```', clean_answer, re.DOTALL)
+                # Look for code blocks in the answer (skip the regex when there is no fence at all)
+                code_blocks = _CODE_BLOCK_RE.findall(clean_answer) if '```' in clean_answer else []
                 if code_blocks:
                     generated_code = '\n'.join(code_blocks)
                 else:
@@ -1234,7 +1519,7 @@ USER REQUEST:
                         generated_code = '\n'.join(code_lines)
             
             # Fallback message if no code was captured
-            if not generated_code.strip():
+            if not _has_content(generated_code):
                 # Create a summary based on the tool that was likely used
                 if "textbox" in message.lower() or "add" in message.lower():
                     tool_name = "add_textbox_tool"
@@ -1262,17 +1547,18 @@ ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
 presentation = ppt_app.ActivePresentation
 
 # Tool executed with your parameters
-# Result: {strip_ansi_codes(answer) if answer else 'Operation completed'}"""
+# Result: {stripped_answer if answer else 'Operation completed'}"""
             
             # Clean the final answer
-            clean_answer = strip_ansi_codes(answer) if answer else "Operation completed"
+            clean_answer = stripped_answer if answer else "Operation completed"
             
-            add_trace_event("agent_completed", 
-                success=True, 
-                answer_length=len(clean_answer),
-                code_generated=bool(generated_code.strip()),
-                context_updated=bool(updated_context != slide_context)
-            )
+            if _TRACE_ENABLED:
+                add_trace_event("agent_completed", 
+                    success=True, 
+                    answer_length=len(clean_answer),
+                    code_generated=_has_content(generated_code),
+                    context_updated=bool(updated_context != slide_context)
+                )
             
             return {
                 'answer': clean_answer,
@@ -1290,6 +1576,53 @@ presentation = ppt_app.ActivePresentation
                 'debug_output': str(e)
             }
 
+# Static part of the vision user message, built once instead of per request
+VISION_USER_INSTRUCTIONS = "INSTRUCTIONS: You have both textual slide context and a visual representation of the current slide. The image shows the spatial layout with annotated object IDs that correspond to the textual context. Use this comprehensive information to provide accurate and visually-aware assistance."
+
+# Shared OpenAI client for the vision path (keeps the HTTP connection pool alive between requests)
+_vision_client = None
+
+def _get_vision_client():
+    """Get or create the OpenAI client used for vision requests."""
+    global _vision_client
+    if _vision_client is None:
+        import openai
+        # Rate limits, timeouts, connection errors and 5xx responses are retried
+        # by the SDK with exponential backoff before we give up
+        _vision_client = openai.OpenAI(api_key=openai_api_key, max_retries=VISION_API_MAX_RETRIES)
+    return _vision_client
+
+# Timestamps of consecutive vision failures and the time until which vision is skipped
+_vision_failure_times = []
+_vision_disabled_until = 0.0
+
+def _vision_circuit_open():
+    """Return True while the vision path is temporarily disabled after repeated failures."""
+    return time.monotonic() < _vision_disabled_until
+
+def _record_vision_failure():
+    """Count a vision failure and open the circuit once the threshold is reached."""
+    global _vision_disabled_until
+    now = time.monotonic()
+    _vision_failure_times[:] = [t for t in _vision_failure_times if now - t < VISION_FAILURE_WINDOW]
+    _vision_failure_times.append(now)
+    if len(_vision_failure_times) >= VISION_FAILURE_THRESHOLD:
+        _vision_disabled_until = now + VISION_FAILURE_WINDOW
+        _vision_failure_times.clear()
+        print(f"⚠️ Vision disabled for {VISION_FAILURE_WINDOW}s after {VISION_FAILURE_THRESHOLD} consecutive failures")
+
+def _record_vision_success():
+    """Reset the consecutive failure count."""
+    _vision_failure_times.clear()
+
+def _is_permanent_vision_error(error):
+    """Return True for errors the text-only fallback would hit as well (invalid key, missing permissions)."""
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError))
+
 def run_agent_with_vision_support(message, image_base64=None):
     """
     Run the agent with vision support, including base64 image data if provided.
@@ -1306,22 +1639,34 @@ def run_agent_with_vision_support(message, image_base64=None):
         # Fall back to regular text-only processing
         return run_agent_with_code_capture(message)
     
+    if _vision_circuit_open():
+        # Vision failed repeatedly just now - don't pay for another doomed attempt
+        return run_agent_with_code_capture(message)
+    
+    slide_context = "Error reading slide context"
+    
     # Trace the vision-enabled agent interaction
     with trace_tool_call("vision_agent_interaction", user_message=message[:100], has_image=bool(image_base64)):
         try:
-            import openai
-            
-            add_trace_event("vision_agent_start", user_message=message, has_image=True)
+            if _TRACE_ENABLED:
+                add_trace_event("vision_agent_start", user_message=message, has_image=True)
             
             # Get current slide context
-            add_trace_event("context_retrieval", action="getting_slide_context")
+            if _TRACE_ENABLED:
+                add_trace_event("context_retrieval", action="getting_slide_context")
+            reader = get_slide_reader()
+            # Re-reads automatically if tools were run outside an agent request (e.g. from the debug console)
             slide_context = get_current_slide_context()
             
-            # Debug: Print current slide info
-            if "Slide:" in slide_context:
-                slide_line = [line for line in slide_context.split('\n') if line.startswith('Slide:')]
+            # Debug: Log current slide info
+            if logger.isEnabledFor(logging.DEBUG):
+                slide_line = _SLIDE_LINE_RE.search(slide_context)
                 if slide_line:
-                    print(f"🎯 Current slide context: {slide_line[0]}")
+                    logger.debug("Current slide context: %s", slide_line.group(0))
+            
+            # Downscale/re-encode oversized screenshots to cut upload size and vision tokens
+            from slide_visualizer import compress_image_data_url
+            image_base64 = compress_image_data_url(image_base64)
             
             # Create the vision message with image
             system_message = f"""
@@ -1332,12 +1677,11 @@ CURRENT SLIDE CONTEXT:
             user_content = [
                 {
                     "type": "text", 
-                    "text": f"""USER REQUEST:
-{message}
-
-INSTRUCTIONS: You have both textual slide context and a visual representation of the current slide. The image shows the spatial layout with annotated object IDs that correspond to the textual context. Use this comprehensive information to provide accurate and visually-aware assistance."""
+                    "text": f"USER REQUEST:\n{message}\n\n{VISION_USER_INSTRUCTIONS}"
                 },
                 {
+                    # Chat Completions only accepts image URLs/data URIs here (uploaded file IDs are
+                    # not accepted for images), so the already-compressed data URI is sent inline
                     "type": "image_url",
                     "image_url": {
                         "url": image_base64
@@ -1345,79 +1689,69 @@ INSTRUCTIONS: You have both textual slide context and a visual representation of
                 }
             ]
             
-            # Clear previous captured code
-            code_capture_handler.clear()
-            
-            # Set up logging to capture output
-            logger = logging.getLogger()
-            logger.addHandler(code_capture_handler)
-            logger.setLevel(logging.DEBUG)
+            # Clear previous captured code and set up logging to capture output
+            previous_log_level = _start_code_capture()
             
             # Capture stdout/stderr
-            stdout_backup = sys.stdout
-            stderr_backup = sys.stderr
-            stdout_capture = io.StringIO()
-            stderr_capture = io.StringIO()
+            stdout_capture = _BoundedCapture()
+            stderr_capture = _BoundedCapture()
             
             try:
-                sys.stdout = stdout_capture
-                sys.stderr = stderr_capture
-                
-                # Initialize OpenAI client
-                client = openai.OpenAI(api_key=openai_api_key)
+                with contextlib.redirect_stdout(stdout_capture), contextlib.redirect_stderr(stderr_capture):
+                    client = _get_vision_client()
                 
-                # Make the vision API call
-                add_trace_event("vision_api_call", action="calling_openai_vision_api")
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": user_content}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.1
-                )
+                    # Make the vision API call
+                    if _TRACE_ENABLED:
+                        add_trace_event("vision_api_call", action="calling_openai_vision_api")
+                    response = client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=[
+                            {"role": "system", "content": system_message},
+                            {"role": "user", "content": user_content}
+                        ],
+                        max_tokens=1000,
+                        temperature=0.1
+                    )
                 
-                answer = response.choices[0].message.content
-                add_trace_event("vision_api_response", answer_length=len(answer) if answer else 0)
+                    answer = response.choices[0].message.content
+                    _record_vision_success()
+                    if _TRACE_ENABLED:
+                        add_trace_event("vision_api_response", answer_length=len(answer) if answer else 0)
                 
             finally:
-                # Restore stdout/stderr
-                sys.stdout = stdout_backup
-                sys.stderr = stderr_backup
-                logger.removeHandler(code_capture_handler)
+                _stop_code_capture(previous_log_level)
             
-            # Get captured outputs and clean them
-            stdout_content = strip_ansi_codes(stdout_capture.getvalue())
-            stderr_content = strip_ansi_codes(stderr_capture.getvalue())
+            # Get captured outputs (stdout/stderr were cleaned as they were written) and clean the rest
+            stdout_content = stdout_capture.getvalue()
+            stderr_content = stderr_capture.getvalue()
             captured_code = strip_ansi_codes(code_capture_handler.get_code())
+            stripped_answer = strip_ansi_codes(str(answer) if answer else "")
             
-            # Force refresh the slide context after processing
+            # Force refresh the slide context after processing, but only if something changed it
             try:
-                add_trace_event("context_refresh", action="refreshing_slide_context")
-                reader = get_slide_reader()
-                if reader and reader.ppt_app:
+                if _TRACE_ENABLED:
+                    add_trace_event("context_refresh", action="refreshing_slide_context")
+                if _take_slide_context_dirty() and reader and reader.ppt_app:
                     updated_context = reader.force_refresh_context()
-                    print("✅ Slide context refreshed after vision agent execution")
+                    logger.debug("Slide context refreshed after vision agent execution")
                 else:
                     updated_context = slide_context
             except Exception as e:
-                print(f"⚠️ Warning: Could not refresh context after execution: {e}")
+                logger.warning("Could not refresh context after execution: %s", e)
                 updated_context = slide_context
             
             # Extract any code patterns from the response
             generated_code = ""
-            if captured_code.strip():
+            if _has_content(captured_code):
                 generated_code = captured_code
             elif answer:
-                import re
-                # Look for code blocks in the answer
-                code_blocks = re.findall(r'```(?:python)?\n?(.*?)\n?```', answer, re.DOTALL)
+                # Look for code blocks in the answer (skip the regex when there is no fence at all)
+                code_blocks = _CODE_BLOCK_RE.findall(answer) if '```' in answer else []
                 if code_blocks:
                     generated_code = '\n'.join(code_blocks)
             
             # Fallback if no code was generated
-            if not generated_code.strip():
+            if not _has_content(generated_code):
                 generated_code = f"""# Vision-Enhanced Agent Response
 # Request: "{message}"
 # 
@@ -1429,17 +1763,18 @@ INSTRUCTIONS: You have both textual slide context and a visual representation of
 # - Visual layout and design elements  
 # - Spatial context for positioning decisions
 #
-# Response: {answer[:200] if answer else 'Operation completed'}{'...' if answer and len(answer) > 200 else ''}"""
+# Response: {_truncate(answer, 200) if answer else 'Operation completed'}"""
             
             # Clean the final answer
-            clean_answer = strip_ansi_codes(answer) if answer else "Vision analysis completed"
+            clean_answer = stripped_answer if answer else "Vision analysis completed"
             
-            add_trace_event("vision_agent_completed", 
-                success=True, 
-                answer_length=len(clean_answer),
-                code_generated=bool(generated_code.strip()),
-                context_updated=bool(updated_context != slide_context)
-            )
+            if _TRACE_ENABLED:
+                add_trace_event("vision_agent_completed", 
+                    success=True, 
+                    answer_length=len(clean_answer),
+                    code_generated=_has_content(generated_code),
+                    context_updated=bool(updated_context != slide_context)
+                )
             
             return {
                 'answer': clean_answer,
@@ -1451,6 +1786,17 @@ INSTRUCTIONS: You have both textual slide context and a visual representation of
         except Exception as e:
             add_trace_event("vision_agent_error", error=str(e), error_type=type(e).__name__)
             print(f"❌ Vision agent error: {str(e)}")
+            _record_vision_failure()
+            
+            # The text-only agent uses the same credentials, so retrying it would fail the same way
+            if _is_permanent_vision_error(e):
+                return {
+                    'answer': f"Vision unavailable: {str(e)}",
+                    'generated_code': '',
+                    'slide_context': slide_context,
+                    'debug_output': str(e)
+                }
+            
             # Fallback to regular agent if vision fails
             return run_agent_with_code_capture(message)
 
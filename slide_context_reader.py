@@ -7,27 +7,183 @@ This script tests the functionality to:
 3. Monitor slide changes and update context accordingly
 """
 
+import logging
 import win32com.client
 import pythoncom
+import threading
 import time
 import json
 from datetime import datetime
+from functools import cached_property, lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+# HTML special characters escaped in a single translate() pass
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Opening/closing tag strings for every bold/italic/underline/strike
+# combination, indexed by a 4-bit mask (bold=8, italic=4, underline=2, strike=1)
+def _build_format_tags():
+    tag_bits = ((8, 'b'), (4, 'i'), (2, 'u'), (1, 's'))
+    table = []
+    for mask in range(16):
+        tags = [tag for bit, tag in tag_bits if mask & bit]
+        table.append((''.join(f'<{tag}>' for tag in tags),
+                      ''.join(f'</{tag}>' for tag in reversed(tags))))
+    return tuple(table)
+
+_FORMAT_TAGS = _build_format_tags()
+
+@lru_cache(maxsize=128)
+def _color_to_hex(color_rgb):
+    """Format a color value as '#rrggbb' for the HTML context; a slide uses only a handful of colors."""
+    r = (color_rgb >> 16) & 0xFF
+    g = (color_rgb >> 8) & 0xFF
+    b = color_rgb & 0xFF
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+# Polling fallback of monitor_slide_changes backs off to at most this many intervals
+_MAX_POLL_BACKOFF = 8
+
+# MsoTriState value for "on" across the whole range
+_MSO_TRUE = -1
+
+# Built once at import; analyze_shape looks these up for every shape
+_SHAPE_TYPE_NAMES = {
+    1: "AutoShape",
+    2: "Callout",
+    3: "Chart",
+    4: "Comment",
+    5: "Freeform",
+    6: "Group",
+    7: "Embedded OLE Object",
+    8: "Line",
+    9: "Linked OLE Object",
+    10: "Linked Picture",
+    11: "Media",
+    12: "OLE Control",
+    13: "Picture",
+    14: "Placeholder",
+    15: "Text Effect",
+    16: "Title",
+    17: "Picture",
+    18: "Script Anchor",
+    19: "Table",
+    20: "Canvas",
+    21: "Diagram",
+    22: "Ink",
+    23: "Ink Comment",
+    24: "Smart Art",
+    25: "Web Video"
+}
+
+_FILL_TYPE_NAMES = {
+    0: "Mixed",
+    1: "Solid",
+    2: "Gradient",
+    3: "Textured",
+    4: "Pattern",
+    5: "Picture",
+    6: "Background"
+}
+
+
+def _ensure_early_bound(com_object):
+    """
+    Wrap a COM object in its makepy (early-bound) class so property reads
+    use typed InvokeTypes calls instead of late-bound IDispatch lookups.
+
+    The type library is generated on first use from the object's own type
+    info, so no PowerPoint version is hard-coded. Falls back to the
+    late-bound object if the gen_py cache cannot be built.
+    """
+    try:
+        return win32com.client.gencache.EnsureDispatch(com_object)
+    except Exception:
+        return com_object
+
+
+# DISPID of TextRange.Text, resolved on first use
+_TEXT_RANGE_TEXT_DISPID = None
+
+
+def _read_text_fast(text_range):
+    """
+    Read TextRange.Text with a raw IDispatch.Invoke.
+
+    The text is always a BSTR, so this skips win32com's per-call result
+    coercion and wrapping. Used in the table cell loop, which reads one
+    range per cell. Falls back to the normal property read on any error.
+    """
+    global _TEXT_RANGE_TEXT_DISPID
+    try:
+        oleobj = text_range._oleobj_
+        if _TEXT_RANGE_TEXT_DISPID is None:
+            _TEXT_RANGE_TEXT_DISPID = oleobj.GetIDsOfNames('Text')
+        return oleobj.Invoke(_TEXT_RANGE_TEXT_DISPID, 0, pythoncom.DISPATCH_PROPERTYGET, True)
+    except Exception:
+        return text_range.Text
+
+
+# DISPIDs of the scalar Shape properties the lean reader fetches, resolved on first use
+_SHAPE_PROPERTY_DISPIDS = {}
+
+
+def _read_shape_property(shape, name):
+    """
+    Read a scalar Shape property with a raw IDispatch.Invoke on its cached DISPID.
+
+    Skips win32com's per-access name lookup and result wrapping. Only used for
+    properties that return plain numbers, never for ones returning objects.
+    """
+    oleobj = shape._oleobj_
+    dispid = _SHAPE_PROPERTY_DISPIDS.get(name)
+    if dispid is None:
+        dispid = _SHAPE_PROPERTY_DISPIDS[name] = oleobj.GetIDsOfNames(name)
+    return oleobj.Invoke(dispid, 0, pythoncom.DISPATCH_PROPERTYGET, True)
+
+
+class _SlideChangeEvents:
+    """PowerPoint application event sink that flags slide changes for monitor_slide_changes."""
+    
+    def __init__(self):
+        # Start flagged so the monitor reads the current slide on its first pass
+        self.slide_changed = True
+    
+    def OnWindowSelectionChange(self, sel):
+        self.slide_changed = True
+    
+    def OnSlideSelectionChanged(self, sld_range):
+        self.slide_changed = True
+    
+    def OnSlideShowNextSlide(self, wn):
+        self.slide_changed = True
+
 
 class PowerPointSlideReader:
     def __init__(self):
         """Initialize the PowerPoint application connection."""
         pythoncom.CoInitialize()
+        # close() must balance this CoInitialize on the thread that made it
+        self._com_thread = threading.get_ident()
         try:
-            self.ppt_app = win32com.client.GetActiveObject("PowerPoint.Application")
+            self.ppt_app = _ensure_early_bound(win32com.client.GetActiveObject("PowerPoint.Application"))
             self.presentation = self.ppt_app.ActivePresentation
             self.current_slide_index = None
             self.current_slide_context = ""
+            self._preferred_slide_index_method = 0
             print("✅ Connected to PowerPoint successfully!")
         except Exception as e:
             print(f"❌ Error connecting to PowerPoint: {e}")
             print("Make sure PowerPoint is open with an active presentation.")
             self.ppt_app = None
     
+    @cached_property
+    def _slides(self):
+        """The presentation's Slides collection, fetched once; its Count is still read live."""
+        return self.presentation.Slides
+    
     def get_current_slide_index(self):
         """Get the index of the currently selected/active slide."""
         try:
@@ -37,95 +193,110 @@ class PowerPointSlideReader:
             # Get the active window
             active_window = self.ppt_app.ActiveWindow
             
-            # Method 1: Try to get from the current view (most reliable for normal view)
-            try:
-                if hasattr(active_window, 'View') and hasattr(active_window.View, 'Slide'):
-                    slide_index = active_window.View.Slide.SlideIndex
-                    if slide_index > 0:  # Valid slide index
-                        return slide_index
-            except:
-                pass
-            
-            # Method 2: Try to get from selection (works in slide sorter view)
-            try:
-                if (hasattr(active_window, 'Selection') and 
-                    hasattr(active_window.Selection, 'SlideRange') and
-                    active_window.Selection.SlideRange.Count > 0):
-                    return active_window.Selection.SlideRange[0].SlideIndex
-            except:
-                pass
-            
-            # Method 3: Try to get from active pane (works in some views)
-            try:
-                if hasattr(active_window, 'ActivePane') and hasattr(active_window.ActivePane, 'View'):
-                    pane_view = active_window.ActivePane.View
-                    if hasattr(pane_view, 'Slide'):
-                        return pane_view.Slide.SlideIndex
-            except:
-                pass
-            
-            # Method 4: Try SlideShowWindow if in slideshow mode
-            try:
-                if hasattr(self.ppt_app, 'SlideShowWindows') and self.ppt_app.SlideShowWindows.Count > 0:
-                    slide_show = self.ppt_app.SlideShowWindows(1)
-                    if hasattr(slide_show, 'View') and hasattr(slide_show.View, 'CurrentShowPosition'):
-                        return slide_show.View.CurrentShowPosition
-            except:
-                pass
+            # Try the lookup that worked last time first: outside normal view the
+            # earlier methods would otherwise fail (and cost round-trips) on every call
+            methods = self._SLIDE_INDEX_METHODS
+            preferred = self._preferred_slide_index_method
+            for method_idx in (preferred, *(i for i in range(len(methods)) if i != preferred)):
+                try:
+                    slide_index = methods[method_idx](self, active_window)
+                except:
+                    continue
+                if slide_index:
+                    self._preferred_slide_index_method = method_idx
+                    return slide_index
             
             # Fallback: return 1 if presentation exists
-            if self.presentation and self.presentation.Slides.Count > 0:
+            if self.presentation and self._slides.Count > 0:
                 return 1
             
             return None
             
         except Exception as e:
-            print(f"Error getting current slide index: {e}")
+            logger.warning("Error getting current slide index: %s", e)
             return 1  # Safe fallback
     
+    # hasattr() on a COM object is itself a round-trip, so each method just
+    # fetches what it needs once; a failure raises and the caller moves on
+    
+    def _slide_index_from_view(self, active_window):
+        """Method 1: the current view's slide (most reliable for normal view)."""
+        slide_index = active_window.View.Slide.SlideIndex
+        return slide_index if slide_index > 0 else None
+    
+    def _slide_index_from_selection(self, active_window):
+        """Method 2: the selected slide range (works in slide sorter view)."""
+        slide_range = active_window.Selection.SlideRange
+        return slide_range(1).SlideIndex if slide_range.Count > 0 else None
+    
+    def _slide_index_from_pane(self, active_window):
+        """Method 3: the active pane's view (works in some views)."""
+        return active_window.ActivePane.View.Slide.SlideIndex
+    
+    def _slide_index_from_slideshow(self, active_window):
+        """Method 4: the running slideshow's current position."""
+        slide_show_windows = self.ppt_app.SlideShowWindows
+        return slide_show_windows(1).View.CurrentShowPosition if slide_show_windows.Count > 0 else None
+    
+    _SLIDE_INDEX_METHODS = (
+        _slide_index_from_view,
+        _slide_index_from_selection,
+        _slide_index_from_pane,
+        _slide_index_from_slideshow,
+    )
+    
     def analyze_shape(self, shape):
         """Analyze a single shape and extract its properties with HTML formatting detection."""
         try:
+            shape_type = shape.Type
             shape_info = {
                 'name': shape.Name,
-                'type': self.get_shape_type_name(shape.Type),
+                'type': self.get_shape_type_name(shape_type),
                 'left': round(shape.Left, 2),
                 'top': round(shape.Top, 2),
                 'width': round(shape.Width, 2),
                 'height': round(shape.Height, 2),
                 'visible': shape.Visible,
                 # Static identifiers for reliable object reference
-                'static_id': shape.ID,  # Unique static ID that never changes
+                'static_id': shape.Id,  # Unique static ID that never changes
                 'z_order': shape.ZOrderPosition,  # Layer/stacking order position
                 'auto_shape_type': getattr(shape, 'AutoShapeType', None),  # AutoShape specific type
             }
             
             # Text content with HTML formatting detection
-            if hasattr(shape, 'TextFrame') and shape.TextFrame.HasText:
-                try:
-                    text_range = shape.TextFrame.TextRange
-                    raw_text = text_range.Text
-                    
-                    # Convert PowerPoint formatting to HTML
-                    html_text = self.convert_powerpoint_text_to_html(text_range)
-                    
-                    shape_info['text'] = raw_text  # Keep original for compatibility
-                    shape_info['html_text'] = html_text  # Add HTML version
-                    shape_info['font_name'] = text_range.Font.Name
-                    shape_info['font_size'] = text_range.Font.Size
-                    shape_info['font_bold'] = bool(text_range.Font.Bold)
-                    shape_info['font_italic'] = bool(text_range.Font.Italic)
-                    shape_info['font_color'] = self.get_color_info(text_range.Font.Color)
-                except:
-                    shape_info['text'] = "Could not read text properties"
-                    shape_info['html_text'] = "Could not read text properties"
+            # Each dotted access is a COM round-trip, so bind each object once.
+            # HasTextFrame gates cheaply; hasattr() would fetch TextFrame itself and
+            # its COM error on lines/pictures would escape to the outer handler
+            if shape.HasTextFrame == _MSO_TRUE:
+                text_frame = shape.TextFrame
+                if text_frame.HasText:
+                    try:
+                        text_range = text_frame.TextRange
+                        raw_text = text_range.Text
+                        
+                        # Convert PowerPoint formatting to HTML
+                        html_text = self.convert_powerpoint_text_to_html(text_range)
+                        
+                        font = text_range.Font
+                        shape_info['text'] = raw_text  # Keep original for compatibility
+                        shape_info['html_text'] = html_text  # Add HTML version
+                        shape_info['font_name'] = font.Name
+                        shape_info['font_size'] = font.Size
+                        # Only msoTrue counts; msoMixed (-2) means just part of the range is styled
+                        shape_info['font_bold'] = font.Bold == _MSO_TRUE
+                        shape_info['font_italic'] = font.Italic == _MSO_TRUE
+                        shape_info['font_color'] = self.get_color_info(font.Color)
+                    except:
+                        shape_info['text'] = "Could not read text properties"
+                        shape_info['html_text'] = "Could not read text properties"
             
             # Fill properties
             if hasattr(shape, 'Fill'):
                 try:
                     fill = shape.Fill
-                    shape_info['fill_type'] = self.get_fill_type_name(fill.Type)
-                    if fill.Type == 1:  # Solid fill
+                    fill_type = fill.Type
+                    shape_info['fill_type'] = self.get_fill_type_name(fill_type)
+                    if fill_type == 1:  # Solid fill
                         shape_info['fill_color'] = self.get_color_info(fill.ForeColor)
                 except:
                     pass
@@ -140,50 +311,11 @@ class PowerPointSlideReader:
                 except:
                     pass
             
-            # Special handling for different shape types
-            if shape.Type == 17:  # Picture
-                try:
-                    shape_info['picture_format'] = shape.PictureFormat.CompressLevel
-                except:
-                    pass
-            
-            elif shape.Type == 3:  # Chart
-                try:
-                    if hasattr(shape, 'Chart'):
-                        shape_info['chart_type'] = shape.Chart.ChartType
-                        shape_info['chart_title'] = shape.Chart.ChartTitle.Text if shape.Chart.HasTitle else "No title"
-                except:
-                    pass
-            
-            elif shape.Type == 19:  # Table
-                try:
-                    if hasattr(shape, 'Table'):
-                        table = shape.Table
-                        shape_info['table_rows'] = table.Rows.Count
-                        shape_info['table_columns'] = table.Columns.Count
-                        # Read ALL cell content with HTML formatting
-                        all_cells = []
-                        all_cells_html = []
-                        for row in range(table.Rows.Count):
-                            row_cells = []
-                            row_cells_html = []
-                            for col in range(table.Columns.Count):
-                                try:
-                                    cell_shape = table.Cell(row + 1, col + 1).Shape
-                                    cell_text = cell_shape.TextFrame.TextRange.Text.strip()
-                                    cell_html = self.convert_powerpoint_text_to_html(cell_shape.TextFrame.TextRange)
-                                    
-                                    row_cells.append(cell_text if cell_text else "[Empty]")
-                                    row_cells_html.append(cell_html if cell_html else "[Empty]")
-                                except:
-                                    row_cells.append("[Error reading cell]")
-                                    row_cells_html.append("[Error reading cell]")
-                            all_cells.append(row_cells)
-                            all_cells_html.append(row_cells_html)
-                        shape_info['table_cells'] = all_cells
-                        shape_info['table_cells_html'] = all_cells_html
-                except:
-                    pass
+            # Special handling for different shape types; only shapes whose
+            # type has a detail reader ever enter one of these blocks
+            detail_reader = self._SHAPE_DETAIL_READERS.get(shape_type)
+            if detail_reader is not None:
+                detail_reader(self, shape, shape_info)
             
             return shape_info
             
@@ -197,14 +329,17 @@ class PowerPointSlideReader:
     def analyze_shape_lean(self, shape):
         """Analyze a single shape and extract only essential properties for visualization."""
         try:
+            read = _read_shape_property
             shape_info = {
-                'left': shape.Left,
-                'top': shape.Top,
-                'width': shape.Width,
-                'height': shape.Height,
-                'static_id': shape.ID,
-                'z_order': shape.ZOrderPosition,
-                'has_text': shape.TextFrame.HasText if hasattr(shape, 'TextFrame') else False,
+                'left': read(shape, 'Left'),
+                'top': read(shape, 'Top'),
+                'width': read(shape, 'Width'),
+                'height': read(shape, 'Height'),
+                'static_id': read(shape, 'Id'),
+                'z_order': read(shape, 'ZOrderPosition'),
+                # HasTextFrame is one cheap read; hasattr() would fetch TextFrame itself and
+                # let a COM error on pictures escape, dropping the shape's geometry too
+                'has_text': shape.TextFrame.HasText if read(shape, 'HasTextFrame') == _MSO_TRUE else False,
             }
             return shape_info
         except Exception as e:
@@ -214,6 +349,65 @@ class PowerPointSlideReader:
                 'error': str(e)
             }
     
+    def _read_picture_details(self, shape, shape_info):
+        """Add picture-specific properties to shape_info."""
+        try:
+            shape_info['picture_format'] = shape.PictureFormat.CompressLevel
+        except:
+            pass
+    
+    def _read_chart_details(self, shape, shape_info):
+        """Add chart type and title to shape_info."""
+        try:
+            chart = shape.Chart
+            shape_info['chart_type'] = chart.ChartType
+            shape_info['chart_title'] = chart.ChartTitle.Text if chart.HasTitle else "No title"
+        except:
+            pass
+    
+    def _read_table_details(self, shape, shape_info):
+        """Add table dimensions and every cell's text (plain and HTML) to shape_info."""
+        try:
+            table = shape.Table
+            table_rows = table.Rows
+            shape_info['table_rows'] = table_rows.Count
+            shape_info['table_columns'] = table.Columns.Count
+            # Read ALL cell content with HTML formatting
+            all_cells = []
+            all_cells_html = []
+            # Enumerate rows and their cells directly rather than
+            # resolving every cell through the table.Cell(r, c) indexer
+            for row in table_rows:
+                row_cells = []
+                row_cells_html = []
+                for cell in row.Cells:
+                    try:
+                        cell_text_range = cell.Shape.TextFrame.TextRange
+                        raw_cell_text = _read_text_fast(cell_text_range)
+                        cell_text = raw_cell_text.strip()
+                        # Empty cells have no runs to format; skip the conversion's COM reads
+                        cell_html = self.convert_powerpoint_text_to_html(cell_text_range) if raw_cell_text else ""
+                        
+                        row_cells.append(cell_text if cell_text else "[Empty]")
+                        row_cells_html.append(cell_html if cell_html else "[Empty]")
+                    except:
+                        row_cells.append("[Error reading cell]")
+                        row_cells_html.append("[Error reading cell]")
+                all_cells.append(row_cells)
+                all_cells_html.append(row_cells_html)
+            shape_info['table_cells'] = all_cells
+            shape_info['table_cells_html'] = all_cells_html
+        except:
+            pass
+    
+    # MsoShapeType -> detail reader. 13 is msoPicture; 17 is msoTextBox, which
+    # used to be routed here and raised on every text box.
+    _SHAPE_DETAIL_READERS = {
+        13: _read_picture_details,
+        3: _read_chart_details,
+        19: _read_table_details,
+    }
+    
     def get_layout_name_safe(self, slide):
         """Safely get layout name with error handling."""
         try:
@@ -228,9 +422,6 @@ class PowerPointSlideReader:
             if not full_text:
                 return ""
             
-            html_parts = []
-            current_pos = 1  # PowerPoint uses 1-based indexing
-            
             # Get default color for comparison (from the overall text range)
             default_color = None
             try:
@@ -238,122 +429,78 @@ class PowerPointSlideReader:
             except:
                 default_color = 0  # Assume black as default
             
-            # Process each character to detect formatting changes
-            i = 0
-            while i < len(full_text):
-                char = full_text[i]
+            # Walk the Runs collection: each run has uniform formatting, so one set of
+            # Font reads covers the whole run instead of one set per character.
+            # Each segment is [formatting, [texts]]; formatting is None if unreadable.
+            segments = []
+            runs = text_range.Runs()
+            # Uniformly formatted text (the common case) is a single run: format the
+            # range itself instead of creating and walking a Runs enumerator
+            if runs.Count == 1:
+                runs = (text_range,)
+            for run in runs:
+                run_text = run.Text
+                if not run_text:
+                    continue
                 
                 try:
-                    # Get character range for this position
-                    char_range = text_range.Characters(current_pos, 1)
-                    
-                    # Check formatting
-                    is_bold = bool(char_range.Font.Bold)
-                    is_italic = bool(char_range.Font.Italic)
-                    is_underline = bool(char_range.Font.Underline)
+                    run_font = run.Font
+                    is_bold = bool(run_font.Bold)
+                    is_italic = bool(run_font.Italic)
+                    is_underline = bool(run_font.Underline)
                     
                     # Try to get strikethrough (not always available)
                     is_strikethrough = False
                     try:
-                        is_strikethrough = bool(char_range.Font.Strike)
+                        is_strikethrough = bool(run_font.Strike)
                     except:
                         pass
                     
                     # Get color - handle more carefully
                     color_rgb = default_color  # Default fallback
                     try:
-                        color_rgb = char_range.Font.Color.RGB
+                        color_rgb = run_font.Color.RGB
                     except:
                         pass
                     
-                    # Look ahead to see how many consecutive characters have the same formatting
-                    consecutive_chars = char
-                    j = i + 1
-                    consecutive_length = 1
-                    
-                    while j < len(full_text):
-                        try:
-                            next_char_range = text_range.Characters(current_pos + consecutive_length, 1)
-                            
-                            # Check if formatting is the same
-                            next_bold = bool(next_char_range.Font.Bold)
-                            next_italic = bool(next_char_range.Font.Italic)
-                            next_underline = bool(next_char_range.Font.Underline)
-                            
-                            next_strikethrough = False
-                            try:
-                                next_strikethrough = bool(next_char_range.Font.Strike)
-                            except:
-                                pass
-                            
-                            next_color = default_color  # Default fallback
-                            try:
-                                next_color = next_char_range.Font.Color.RGB
-                            except:
-                                pass
-                            
-                            # If formatting matches, include this character
-                            if (next_bold == is_bold and 
-                                next_italic == is_italic and 
-                                next_underline == is_underline and 
-                                next_strikethrough == is_strikethrough and
-                                next_color == color_rgb):
-                                consecutive_chars += full_text[j]
-                                consecutive_length += 1
-                                j += 1
-                            else:
-                                break
-                        except:
-                            break
-                    
-                    # Build formatting tags
-                    open_tags = []
-                    close_tags = []
-                    
-                    if is_bold:
-                        open_tags.append('<b>')
-                        close_tags.insert(0, '</b>')
-                    if is_italic:
-                        open_tags.append('<i>')
-                        close_tags.insert(0, '</i>')
-                    if is_underline:
-                        open_tags.append('<u>')
-                        close_tags.insert(0, '</u>')
-                    if is_strikethrough:
-                        open_tags.append('<s>')
-                        close_tags.insert(0, '</s>')
-                    
-                    # Handle color - only add color tag if it's different from default AND not black
-                    if color_rgb is not None and color_rgb != default_color:
-                        # Convert BGR to hex (PowerPoint uses BGR format)
-                        r = (color_rgb >> 16) & 0xFF
-                        g = (color_rgb >> 8) & 0xFF
-                        b = color_rgb & 0xFF
-                        hex_color = f"#{r:02x}{g:02x}{b:02x}"
-                        
-                        # Skip black/near-black colors to reduce token usage (optimization)
-                        # Black is the default color, so no need to explicitly specify it
-                        if color_rgb != 0 and hex_color != "#000000":
-                            open_tags.append(f'<span style="color: {hex_color}">')
-                            close_tags.insert(0, '</span>')
-                    # Removed special case for black text - no longer needed for optimization
-                    
-                    # Escape HTML special characters in the text content
-                    escaped_text = consecutive_chars.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    
-                    # Add the formatted text
-                    formatted_text = ''.join(open_tags) + escaped_text + ''.join(close_tags)
-                    html_parts.append(formatted_text)
-                    
-                    # Move to next unprocessed character
-                    i = j
-                    current_pos += consecutive_length
+                    formatting = (is_bold, is_italic, is_underline, is_strikethrough, color_rgb)
+                except:
+                    # Fallback: keep the run's text without formatting
+                    formatting = None
+                
+                # Runs also split on attributes we don't render (size, font name);
+                # merge those so the markup matches a per-character scan
+                if formatting is not None and segments and segments[-1][0] == formatting:
+                    segments[-1][1].append(run_text)
+                else:
+                    segments.append([formatting, [run_text]])
+            
+            html_parts = []
+            for formatting, texts in segments:
+                # Escape HTML special characters in the text content
+                escaped_text = ''.join(texts).translate(_HTML_ESCAPE)
+                if formatting is None:
+                    html_parts.append(escaped_text)
+                    continue
+                
+                is_bold, is_italic, is_underline, is_strikethrough, color_rgb = formatting
+                
+                # Look up the formatting tags for this combination
+                open_tag, close_tag = _FORMAT_TAGS[(is_bold << 3) | (is_italic << 2) | (is_underline << 1) | is_strikethrough]
+                
+                # Handle color - only add color tag if it's different from default AND not black
+                if color_rgb is not None and color_rgb != default_color:
+                    # Convert BGR to hex (PowerPoint uses BGR format)
+                    hex_color = _color_to_hex(color_rgb)
                     
-                except Exception as e:
-                    # Fallback: just add the character without formatting
-                    html_parts.append(char)
-                    i += 1
-                    current_pos += 1
+                    # Skip black/near-black colors to reduce token usage (optimization)
+                    # Black is the default color, so no need to explicitly specify it
+                    if color_rgb != 0 and hex_color != "#000000":
+                        open_tag += f'<span style="color: {hex_color}">'
+                        close_tag = '</span>' + close_tag
+                
+                # Add the formatted text
+                html_parts.append(open_tag + escaped_text + close_tag)
             
             return ''.join(html_parts)
             
@@ -361,49 +508,15 @@ class PowerPointSlideReader:
             # Fallback to plain text
             return text_range.Text if hasattr(text_range, 'Text') else ""
     
-    def get_shape_type_name(self, shape_type):
+    @staticmethod
+    def get_shape_type_name(shape_type):
         """Convert shape type number to readable name."""
-        shape_types = {
-            1: "AutoShape",
-            2: "Callout", 
-            3: "Chart",
-            4: "Comment",
-            5: "Freeform",
-            6: "Group",
-            7: "Embedded OLE Object",
-            8: "Line",
-            9: "Linked OLE Object",
-            10: "Linked Picture",
-            11: "Media",
-            12: "OLE Control",
-            13: "Picture", 
-            14: "Placeholder",
-            15: "Text Effect",
-            16: "Title",
-            17: "Picture",
-            18: "Script Anchor",
-            19: "Table",
-            20: "Canvas",
-            21: "Diagram",
-            22: "Ink",
-            23: "Ink Comment",
-            24: "Smart Art",
-            25: "Web Video"
-        }
-        return shape_types.get(shape_type, f"Unknown Type ({shape_type})")
-    
-    def get_fill_type_name(self, fill_type):
+        return _SHAPE_TYPE_NAMES.get(shape_type, f"Unknown Type ({shape_type})")
+    
+    @staticmethod
+    def get_fill_type_name(fill_type):
         """Convert fill type number to readable name."""
-        fill_types = {
-            0: "Mixed",
-            1: "Solid",
-            2: "Gradient", 
-            3: "Textured",
-            4: "Pattern",
-            5: "Picture",
-            6: "Background"
-        }
-        return fill_types.get(fill_type, f"Unknown Fill ({fill_type})")
+        return _FILL_TYPE_NAMES.get(fill_type, f"Unknown Fill ({fill_type})")
     
     def get_color_info(self, color_obj):
         """Extract color information."""
@@ -421,60 +534,80 @@ class PowerPointSlideReader:
             if not self.presentation:
                 return "No active presentation"
             
-            if slide_index > self.presentation.Slides.Count:
-                return f"Slide {slide_index} does not exist (total slides: {self.presentation.Slides.Count})"
+            slides = self._slides
+            total_slides = slides.Count
+            if slide_index > total_slides:
+                return f"Slide {slide_index} does not exist (total slides: {total_slides})"
             
-            slide = self.presentation.Slides(slide_index)
+            slide = slides(slide_index)
+            shapes = slide.Shapes
+            shape_count = shapes.Count
             
             slide_info = {
                 'slide_index': slide_index,
-                'total_shapes': slide.Shapes.Count,
+                'total_shapes': shape_count,
                 'shapes': []
             }
             
             # Analyze each shape in the slide using the lean analyzer
-            for i in range(1, slide.Shapes.Count + 1):
-                shape = slide.Shapes(i)
-                shape_info = self.analyze_shape_lean(shape)
-                slide_info['shapes'].append(shape_info)
+            slide_info['shapes'] = [self.analyze_shape_lean(shapes(i)) for i in range(1, shape_count + 1)]
             
             return slide_info
             
         except Exception as e:
             return f"Error reading slide {slide_index} lean: {e}"
     
+    def get_index_and_content(self):
+        """
+        Get the current slide index together with its lean content.
+
+        Returns:
+            tuple: (slide_index, slide_info), or (None, None) if no slide is active.
+                slide_info is an error string if the slide could not be read.
+        """
+        slide_index = self.get_current_slide_index()
+        if not slide_index:
+            return None, None
+        return slide_index, self.read_slide_content_lean(slide_index)
+    
     def read_slide_content(self, slide_index):
         """Read all content from a specific slide."""
         try:
             if not self.presentation:
                 return "No active presentation"
             
-            if slide_index > self.presentation.Slides.Count:
-                return f"Slide {slide_index} does not exist (total slides: {self.presentation.Slides.Count})"
+            # Read each collection and count once; format_slide_context reuses total_slides
+            slides = self._slides
+            total_slides = slides.Count
+            if slide_index > total_slides:
+                return f"Slide {slide_index} does not exist (total slides: {total_slides})"
             
-            slide = self.presentation.Slides(slide_index)
+            slide = slides(slide_index)
+            shapes = slide.Shapes
+            shape_count = shapes.Count
             
             slide_info = {
                 'slide_index': slide_index,
+                'total_slides': total_slides,
                 'slide_name': slide.Name,
                 'layout_name': self.get_layout_name_safe(slide),
-                'timestamp': datetime.now().isoformat(),
-                'total_shapes': slide.Shapes.Count,
+                'timestamp': time.time(),  # Formatted only when the context is rendered
+                'total_shapes': shape_count,
                 'shapes': []
             }
             
-            # Analyze each shape in the slide
-            for i in range(1, slide.Shapes.Count + 1):
-                shape = slide.Shapes(i)
-                shape_info = self.analyze_shape(shape)
-                slide_info['shapes'].append(shape_info)
+            # Analyze each shape in the slide. This stays serial on purpose:
+            # PowerPoint is a single-threaded apartment server, so calls from
+            # worker threads would be marshalled back and queued behind each other.
+            slide_info['shapes'] = [self.analyze_shape(shapes(i)) for i in range(1, shape_count + 1)]
             
             # Check for slide notes
             try:
-                if slide.NotesPage.Shapes.Count > 1:  # Usually shape 1 is the slide thumbnail
-                    notes_shape = slide.NotesPage.Shapes(2)  # Notes text is usually shape 2
-                    if notes_shape.TextFrame.HasText:
-                        slide_info['notes'] = notes_shape.TextFrame.TextRange.Text
+                notes_shapes = slide.NotesPage.Shapes
+                if notes_shapes.Count > 1:  # Usually shape 1 is the slide thumbnail
+                    notes_frame = notes_shapes(2).TextFrame  # Notes text is usually shape 2
+                    if notes_frame.HasText:
+                        slide_info['notes'] = notes_frame.TextRange.Text
                 else:
                     slide_info['notes'] = ""
             except:
@@ -483,14 +616,21 @@ class PowerPointSlideReader:
             # Check for animations
             try:
                 timeline = slide.TimeLine
-                if timeline.MainSequence.Count > 0:
+                main_sequence = timeline.MainSequence
+                effect_count = main_sequence.Count
+                if effect_count > 0:
                     animations = []
-                    for j in range(1, timeline.MainSequence.Count + 1):
-                        effect = timeline.MainSequence(j)
+                    for j in range(1, effect_count + 1):
+                        effect = main_sequence(j)
+                        # Read the target shape directly; a hasattr probe costs its own round-trip
+                        try:
+                            shape_name = effect.Shape.Name
+                        except:
+                            shape_name = "Unknown"
                         animation_info = {
                             'effect_type': effect.EffectType,
                             'trigger_type': effect.Timing.TriggerType,
-                            'shape_name': effect.Shape.Name if hasattr(effect, 'Shape') else "Unknown"
+                            'shape_name': shape_name
                         }
                         animations.append(animation_info)
                     slide_info['animations'] = animations
@@ -519,121 +659,165 @@ class PowerPointSlideReader:
         
         When modifying text, you can use these same HTML tags in your tool calls.
         """
+        # Join once instead of re-copying the string per append
+        return ''.join(self.iter_slide_context(slide_info))
+    
+    def iter_slide_context(self, slide_info):
+        """Yield the formatted slide context piece by piece, for callers that stream it."""
         if isinstance(slide_info, str):
-            return slide_info
+            yield slide_info
+            return
         
-        context = f"""
+        yield f"""
 === POWERPOINT SLIDE CONTEXT (HTML FORMATTED) ===
 *** IMPORTANT: ALL TEXT CONTENT BELOW IS IN HTML FORMAT ***
 *** Use HTML tags like <b>, <i>, <u>, <s>, <span style="color: #RRGGBB"> when modifying text ***
 
-Slide: {slide_info['slide_index']} of {self.presentation.Slides.Count}
+Slide: {slide_info['slide_index']} of {slide_info.get('total_slides') or self._slides.Count}
 Name: {slide_info['slide_name']}
 Layout: {slide_info['layout_name']}
 Total Objects: {slide_info['total_shapes']}
-Last Updated: {slide_info['timestamp']}
+Last Updated: {datetime.fromtimestamp(slide_info['timestamp']).isoformat()}
 
 === SLIDE CONTENT (HTML FORMATTED) ===
 """
         
         if slide_info['shapes']:
             for i, shape in enumerate(slide_info['shapes'], 1):
-                context += f"\n--- Object {i}: {shape['name']} ---\n"
-                context += f"Type: {shape['type']}\n"
-                context += f"Position: ({shape.get('left', 'N/A')}, {shape.get('top', 'N/A')})\n"
-                context += f"Size: {shape.get('width', 'N/A')} x {shape.get('height', 'N/A')}\n"
-                context += f"ID: {shape['static_id']}\n"
+                yield from (
+                    f"\n--- Object {i}: {shape['name']} ---\n",
+                    f"Type: {shape['type']}\n",
+                    f"Position: ({shape.get('left', 'N/A')}, {shape.get('top', 'N/A')})\n",
+                    f"Size: {shape.get('width', 'N/A')} x {shape.get('height', 'N/A')}\n",
+                    f"ID: {shape['static_id']}\n",
+                )
                 
                 if 'html_text' in shape and shape['html_text']:
                     # Show HTML-formatted text as the primary text content
-                    context += f"Text: {shape['html_text']}\n"
-                    
-                    if 'font_name' in shape:
-                        context += f"Font: {shape['font_name']}, Size: {shape.get('font_size', 'N/A')}\n"
-                        if shape.get('font_bold') or shape.get('font_italic'):
-                            styles = []
-                            if shape.get('font_bold'): styles.append("Bold")
-                            if shape.get('font_italic'): styles.append("Italic")
-                            context += f"Base Styles: {', '.join(styles)}\n"
+                    yield f"Text: {shape['html_text']}\n"
+                    styles_label = "Base Styles"
                 elif 'text' in shape:
                     # Fallback to plain text if HTML conversion failed
-                    context += f"Text: {shape['text']}\n"
-                    
-                    if 'font_name' in shape:
-                        context += f"Font: {shape['font_name']}, Size: {shape.get('font_size', 'N/A')}\n"
-                        if shape.get('font_bold') or shape.get('font_italic'):
-                            styles = []
-                            if shape.get('font_bold'): styles.append("Bold")
-                            if shape.get('font_italic'): styles.append("Italic")
-                            context += f"Styles: {', '.join(styles)}\n"
+                    yield f"Text: {shape['text']}\n"
+                    styles_label = "Styles"
+                else:
+                    styles_label = None
+                
+                if styles_label and 'font_name' in shape:
+                    yield f"Font: {shape['font_name']}, Size: {shape.get('font_size', 'N/A')}\n"
+                    if shape.get('font_bold') or shape.get('font_italic'):
+                        styles = []
+                        if shape.get('font_bold'): styles.append("Bold")
+                        if shape.get('font_italic'): styles.append("Italic")
+                        yield f"{styles_label}: {', '.join(styles)}\n"
                 
                 if 'table_rows' in shape:
-                    context += f"Table: {shape['table_rows']} rows x {shape['table_columns']} columns\n"
-                    
-                    # Show HTML-formatted table content if available
-                    if shape.get('table_cells_html'):
-                        context += "Table content:\n"
-                        for row_idx, row_data in enumerate(shape['table_cells_html']):
-                            row_str = " | ".join(row_data)
-                            context += f"  Row {row_idx + 1}: {row_str}\n"
+                    yield f"Table: {shape['table_rows']} rows x {shape['table_columns']} columns\n"
                     
-                    # Fallback to plain table content if HTML is not available
-                    elif shape.get('table_cells'):
-                        context += "Table content:\n"
-                        for row_idx, row_data in enumerate(shape['table_cells']):
-                            row_str = " | ".join(row_data)
-                            context += f"  Row {row_idx + 1}: {row_str}\n"
+                    # Show HTML-formatted table content if available, else the plain cells
+                    table_rows = shape.get('table_cells_html') or shape.get('table_cells')
+                    if table_rows:
+                        yield "Table content:\n"
+                        for row_idx, row_data in enumerate(table_rows, 1):
+                            yield f"  Row {row_idx}: {' | '.join(row_data)}\n"
                 
                 if 'chart_type' in shape:
-                    context += f"Chart Type: {shape['chart_type']}\n"
-                    context += f"Chart Title: {shape.get('chart_title', 'No title')}\n"
+                    yield from (
+                        f"Chart Type: {shape['chart_type']}\n",
+                        f"Chart Title: {shape.get('chart_title', 'No title')}\n",
+                    )
         else:
-            context += "\n[No objects found on this slide]\n"
+            yield "\n[No objects found on this slide]\n"
         
         if slide_info.get('notes'):
-            context += f"\n=== SLIDE NOTES (HTML FORMATTED) ===\n{slide_info['notes']}\n"
+            yield f"\n=== SLIDE NOTES (HTML FORMATTED) ===\n{slide_info['notes']}\n"
         
         if slide_info.get('animations') and isinstance(slide_info['animations'], list) and slide_info['animations']:
-            context += f"\n=== ANIMATIONS ===\n"
+            yield "\n=== ANIMATIONS ===\n"
             for i, anim in enumerate(slide_info['animations'], 1):
-                context += f"Animation {i}: Type {anim['effect_type']} on {anim['shape_name']}\n"
+                yield f"Animation {i}: Type {anim['effect_type']} on {anim['shape_name']}\n"
         
-        context += "\n=== END CONTEXT (Remember: Text is HTML formatted!) ===\n"
-        
-        return context
+        yield "\n=== END CONTEXT (Remember: Text is HTML formatted!) ===\n"
     
-    def monitor_slide_changes(self, interval=2, max_iterations=None):
-        """Monitor for slide changes and update context accordingly."""
+    def _connect_slide_events(self):
+        """Subscribe to PowerPoint's application events, or return None to fall back to polling."""
+        try:
+            return win32com.client.DispatchWithEvents(self.ppt_app, _SlideChangeEvents)
+        except Exception as e:
+            print(f"⚠️ Slide change events unavailable, falling back to polling: {e}")
+            return None
+    
+    def monitor_slide_changes(self, interval=2, max_iterations=None, stop_event=None):
+        """
+        Monitor for slide changes and update context accordingly.
+        
+        Args:
+            interval: Seconds per tick; when polling, the shortest delay between checks
+            max_iterations: Stop after this many ticks (None runs until stopped)
+            stop_event: Optional threading.Event; setting it ends monitoring from another thread
+        """
         print("🔍 Starting slide monitoring...")
         print("Switch between slides in PowerPoint to see context updates.")
         print("Press Ctrl+C to stop monitoring.\n")
         
+        events = self._connect_slide_events()
         iteration = 0
+        poll_delay = interval
         try:
             while True:
                 if max_iterations and iteration >= max_iterations:
                     break
+                if stop_event is not None and stop_event.is_set():
+                    break
                 
-                current_slide = self.get_current_slide_index()
+                slide_changed = False
                 
-                if current_slide != self.current_slide_index:
-                    print(f"\n📍 Slide changed: {self.current_slide_index} → {current_slide}")
-                    print("=" * 60)
+                # With an event sink, only query the slide index after PowerPoint reports a change
+                if events is None or events.slide_changed:
+                    if events is not None:
+                        events.slide_changed = False
                     
-                    self.current_slide_index = current_slide
-                    slide_info = self.read_slide_content(current_slide)
-                    self.current_slide_context = self.format_slide_context(slide_info)
+                    current_slide = self.get_current_slide_index()
                     
-                    print(self.current_slide_context)
-                    print("=" * 60)
+                    if current_slide != self.current_slide_index:
+                        slide_changed = True
+                        print(f"\n📍 Slide changed: {self.current_slide_index} → {current_slide}")
+                        print("=" * 60)
+                        
+                        self.current_slide_index = current_slide
+                        slide_info = self.read_slide_content(current_slide)
+                        self.current_slide_context = self.format_slide_context(slide_info)
+                        
+                        print(self.current_slide_context)
+                        print("=" * 60)
                 
-                time.sleep(interval)
+                if events is None:
+                    # Back off while the slide stays put; snap back to interval after a change
+                    poll_delay = interval if slide_changed else min(poll_delay * 2, interval * _MAX_POLL_BACKOFF)
+                    if stop_event is not None:
+                        stop_event.wait(poll_delay)
+                    else:
+                        time.sleep(poll_delay)
+                else:
+                    # Pump COM events for up to one interval, waking early when a change arrives
+                    deadline = time.monotonic() + interval
+                    while not events.slide_changed and time.monotonic() < deadline:
+                        if stop_event is not None and stop_event.is_set():
+                            break
+                        pythoncom.PumpWaitingMessages()
+                        time.sleep(0.05)
                 iteration += 1
                 
         except KeyboardInterrupt:
             print("\n🛑 Monitoring stopped by user.")
         except Exception as e:
             print(f"\n❌ Error during monitoring: {e}")
+        finally:
+            if events is not None:
+                try:
+                    events.close()
+                except Exception:
+                    pass
     
     def get_current_context(self):
         """Get the current slide context. Always checks for slide changes."""
@@ -646,7 +830,7 @@ Last Updated: {slide_info['timestamp']}
             
             # Check if the slide has changed or if we don't have cached context
             if current_slide != self.current_slide_index or not self.current_slide_context:
-                print(f"🔄 Slide context updating: {self.current_slide_index} → {current_slide}")
+                logger.debug("Slide context updating: %s → %s", self.current_slide_index, current_slide)
                 self.current_slide_index = current_slide
                 slide_info = self.read_slide_content(current_slide)
                 self.current_slide_context = self.format_slide_context(slide_info)
@@ -665,7 +849,8 @@ Last Updated: {slide_info['timestamp']}
                 return "Could not determine current slide"
             
             # Force refresh by reading the slide content again
-            print(f"🔄 Force refreshing slide context for slide {current_slide}")
+            self.__dict__.pop('_slides', None)
+            logger.debug("Force refreshing slide context for slide %s", current_slide)
             self.current_slide_index = current_slide
             slide_info = self.read_slide_content(current_slide)
             self.current_slide_context = self.format_slide_context(slide_info)
@@ -677,9 +862,29 @@ Last Updated: {slide_info['timestamp']}
     
     def clear_context_cache(self):
         """Clear the cached context to force a refresh on next access."""
-        print("🗑️ Clearing slide context cache")
+        logger.debug("Clearing slide context cache")
+        self.__dict__.pop('_slides', None)
+        self.current_slide_context = ""
+        self.current_slide_index = None
+    
+    def close(self):
+        """Release the PowerPoint references and balance the constructor's CoInitialize."""
+        self.presentation = None
+        self.ppt_app = None
+        self.__dict__.pop('_slides', None)
         self.current_slide_context = ""
         self.current_slide_index = None
+        
+        com_thread, self._com_thread = self._com_thread, None
+        if com_thread is not None and com_thread == threading.get_ident():
+            pythoncom.CoUninitialize()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
 
 
 def test_slide_reader():
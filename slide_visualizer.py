@@ -3,9 +3,134 @@ import pythoncom
 import cv2
 import numpy as np
 import os
+import tempfile
 from slide_context_reader import PowerPointSlideReader
 import time
-import base64
+import logging
+try:
+    # Optional SIMD base64 codec with the standard library's API
+    import pybase64 as base64
+except ImportError:
+    import base64
+import hashlib
+import functools
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Recently encoded images, keyed by a digest of the encoded bytes, so an unchanged
+# slide screenshot is not base64-encoded again on every request
+_DATA_URL_CACHE_SIZE = 8
+_data_url_cache = OrderedDict()
+
+def _encode_data_url(image_bytes, mime_type):
+    """Return a base64 data URI for the encoded image bytes, reusing a cached copy when possible."""
+    key = (hashlib.blake2b(image_bytes, digest_size=16).digest(), mime_type)
+    data_url = _data_url_cache.get(key)
+    if data_url is not None:
+        _data_url_cache.move_to_end(key)
+        return data_url
+
+    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+    data_url = f"data:{mime_type};base64,{image_base64}"
+    _data_url_cache[key] = data_url
+    if len(_data_url_cache) > _DATA_URL_CACHE_SIZE:
+        _data_url_cache.popitem(last=False)
+    return data_url
+
+@functools.lru_cache(maxsize=8)
+def compress_image_data_url(data_url, max_edge=1024, quality=85):
+    """
+    Shrink a base64 image data URI before it is sent to the vision model.
+
+    The image is downscaled so its long edge is at most max_edge pixels and re-encoded
+    as JPEG. The original URI is returned when it cannot be decoded or when re-encoding
+    would not make it smaller. Results are cached, so each unique slide state is only
+    processed once.
+
+    Args:
+        data_url: Image data URI ("data:image/...;base64,...")
+        max_edge: Maximum width/height of the re-encoded image in pixels
+        quality: JPEG quality (1-100)
+
+    Returns:
+        str: A data URI no larger than the input
+    """
+    header, _, payload = data_url.partition(',')
+    if not header.startswith('data:image/') or not payload:
+        return data_url
+
+    try:
+        image_bytes = base64.b64decode(payload)
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return data_url
+
+        height, width = image.shape[:2]
+        long_edge = max(height, width)
+        if long_edge > max_edge:
+            scale = max_edge / long_edge
+            image = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+        compressed = SlideVisualizer.image_to_base64(image, format='JPEG', quality=quality)
+        if compressed is None or len(compressed) >= len(data_url):
+            return data_url
+        return compressed
+
+    except Exception as e:
+        logger.warning("Could not compress image for vision model: %s", e)
+        return data_url
+
+# Encoder settings for preview images, keyed by file extension: fast PNG compression
+# (libpng's default level 6 dominates the save time) and high-quality JPEG
+_IMWRITE_PARAMS = {
+    '.png': [cv2.IMWRITE_PNG_COMPRESSION, 1],
+    '.jpg': [cv2.IMWRITE_JPEG_QUALITY, 90],
+    '.jpeg': [cv2.IMWRITE_JPEG_QUALITY, 90],
+}
+
+# Scratch path (minus extension) for slide exports, in the system temp directory and
+# unique to this process; built once instead of on every export
+_EXPORT_TEMP_STEM = os.path.join(tempfile.gettempdir(), f"ppt_assistant_slide_{os.getpid()}")
+
+# High-contrast overlay colours (BGR): bright green boxes, yellow labels with black text
+_BOX_COLOR = (0, 255, 0)
+_LABEL_BG_COLOR = (0, 255, 255)
+_LABEL_TEXT_COLOR = (0, 0, 0)
+
+# Agent-facing explanation sent alongside the annotated slide image; only the width varies
+_VISUAL_CONTEXT_DESCRIPTION = """
+=== VISUAL SLIDE REPRESENTATION ===
+
+This is an annotated visual representation of the current PowerPoint slide with the following features:
+
+🔍 VISUAL ANNOTATIONS:
+- Green bounding boxes highlight all interactive objects/shapes on the slide
+- Yellow labels show unique object IDs (e.g., "ID:123") for precise reference
+- Image is downsampled to {target_width}px width for efficient processing
+- All text, images, charts, and other slide elements are visually represented
+
+💡 HOW TO USE THIS IMAGE:
+- Use this visual context to understand the spatial layout of slide elements
+- Reference object IDs when making modifications (the IDs match the textual context)
+- Analyze positioning, sizing, and visual relationships between elements
+- Identify visual design issues, alignment problems, or layout improvements
+- This complements the textual slide context for comprehensive understanding
+
+⚠️ IMPORTANT NOTES:
+- Object IDs in yellow labels correspond exactly to the IDs in the textual context
+- Use the textual context for precise measurements and detailed properties
+- This image shows the current state of the slide at the time of generation
+- Visual and textual contexts are synchronized and represent the same slide state
+
+This visual representation enables you to provide more accurate and contextually aware assistance with slide design, layout, and content positioning.
+=== END VISUAL CONTEXT ===
+"""
+
+@functools.lru_cache(maxsize=8)
+def _describe_visual_context(target_width):
+    """Return the agent-facing description of the annotated slide image for the given width."""
+    return _VISUAL_CONTEXT_DESCRIPTION.format(target_width=target_width).strip()
 
 class SlideVisualizer:
     def __init__(self):
@@ -19,6 +144,12 @@ class SlideVisualizer:
         self.presentation = self.reader.presentation
         self.slide_width_points = self.presentation.PageSetup.SlideWidth
         self.slide_height_points = self.presentation.PageSetup.SlideHeight
+        self._aspect_ratio = self.slide_height_points / self.slide_width_points
+        # Bordered canvas reused by create_highlighted_slide_image while its size is unchanged
+        self._canvas = None
+        # Rulers depend only on the slide and export geometry, so they are rendered once per size
+        self._ruler_layer = None
+        self._ruler_layer_key = None
 
     @staticmethod
     def image_to_base64(image, format='JPEG', quality=85):
@@ -49,97 +180,150 @@ class SlideVisualizer:
                 raise ValueError(f"Unsupported format: {format}")
                 
             if not success:
-                print(f"❌ Failed to encode image to {format}")
+                logger.error("Failed to encode image to %s", format)
                 return None
                 
-            # Convert to base64
-            image_base64 = base64.b64encode(buffer).decode('utf-8')
-            
-            # Return with data URI prefix
-            return f"data:{mime_type};base64,{image_base64}"
+            # Convert to base64 and return with data URI prefix
+            return _encode_data_url(buffer.tobytes(), mime_type)
             
         except Exception as e:
-            print(f"❌ Error converting image to base64: {e}")
+            logger.error("Error converting image to base64: %s", e)
             return None
 
     def _get_slide_export_dimensions(self, image_width):
         """Calculates the export height based on a given width to maintain aspect ratio."""
-        aspect_ratio = self.slide_height_points / self.slide_width_points
-        image_height = int(image_width * aspect_ratio)
+        image_height = int(image_width * self._aspect_ratio)
         return image_width, image_height
 
-    def get_downsampled_slide_image(self, target_width=512, file_format="JPG"):
+    def _visible_shapes(self, slide_info):
+        """Returns the shapes that overlap the slide area; shapes parked off-slide are not drawn."""
+        slide_width = self.slide_width_points
+        slide_height = self.slide_height_points
+        return [
+            shape for shape in slide_info.get('shapes', [])
+            if shape.get('left', 0) < slide_width and shape.get('top', 0) < slide_height
+            and shape.get('left', 0) + shape.get('width', 0) > 0
+            and shape.get('top', 0) + shape.get('height', 0) > 0
+        ]
+
+    def _draw_shape_overlays(self, image, slide_info, scale_x, scale_y, font_scale, font_thickness,
+                             box_thickness, label_gap, label_pad, offset=0):
         """
-        Exports the current slide, downsamples it, and then adds highlights with scaled fonts.
+        Draws a bounding box and an "ID:<static_id>" label for each visible shape.
+
+        Args:
+            image: The image to draw on, modified in place.
+            slide_info (dict): Lean slide content from the reader.
+            scale_x, scale_y (float): Pixels per point on each axis.
+            font_scale (float), font_thickness (int): Label font settings.
+            box_thickness (int): Bounding box line width in pixels.
+            label_gap (int): Pixels between the label baseline and the top of the box.
+            label_pad (int): Padding of the label background around the text.
+            offset (int): Pixel offset of the slide within the image (e.g. a ruler border).
+        """
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        text_inset = label_pad // 2
+
+        for shape in self._visible_shapes(slide_info):
+            try:
+                static_id = shape.get('static_id')
+                if static_id is None:
+                    continue
+
+                # Scale coordinates and offset for the image
+                x = int(shape.get('left', 0) * scale_x) + offset
+                y = int(shape.get('top', 0) * scale_y) + offset
+                w = int(shape.get('width', 0) * scale_x)
+                h = int(shape.get('height', 0) * scale_y)
+
+                cv2.rectangle(image, (x, y), (x + w, y + h), _BOX_COLOR, box_thickness)
+
+                id_text = f"ID:{static_id}"
+                (tw, th), _ = cv2.getTextSize(id_text, font, font_scale, font_thickness)
+
+                # Place the label above the box, or below it when it would leave the image
+                text_x, text_y = x, y - label_gap
+                if text_y < th:
+                    text_y = y + h + th + 5
+
+                cv2.rectangle(image, (text_x, text_y - th - label_pad),
+                              (text_x + tw + label_pad, text_y + label_pad), _LABEL_BG_COLOR, -1)
+                cv2.putText(image, id_text, (text_x + text_inset, text_y),
+                            font, font_scale, _LABEL_TEXT_COLOR, font_thickness, cv2.LINE_AA)
+
+            except Exception as e:
+                logger.warning("Error processing shape %s: %s", shape.get('name', 'N/A'), e)
+
+    @staticmethod
+    def _export_slide_image(slide, width, height, file_format="BMP"):
+        """
+        Renders a slide to an OpenCV image at the given pixel size.
+
+        PowerPoint can only export to a file, so the image goes through a scratch file in
+        the system temp directory that is removed as soon as it has been decoded. BMP is
+        the default because it is an uncompressed pixel dump that is fast to write and read.
+
+        Returns:
+            numpy.ndarray: The BGR image, or None if it could not be read back.
+        """
+        temp_path = f"{_EXPORT_TEMP_STEM}.{file_format.lower()}"
+        try:
+            slide.Export(temp_path, file_format, width, height)
+            image = cv2.imread(temp_path)
+            if image is None:
+                logger.error("Failed to load image from: %s", temp_path)
+            return image
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get_downsampled_slide_image(self, target_width=512, file_format="BMP", hires=False):
+        """
+        Exports the current slide at the target width and adds highlights with scaled fonts.
+
+        PowerPoint renders the slide at the requested size directly. Pass hires=True to
+        export at 1920px and area-downsample instead, for supersampled antialiasing.
         """
         try:
             # 1. Get slide data and index
-            slide_index = self.reader.get_current_slide_index()
+            slide_index, slide_info = self.reader.get_index_and_content()
             if not slide_index:
-                print("❌ Could not get current slide index.")
+                logger.error("Could not get current slide index.")
                 return None
             slide = self.presentation.Slides(slide_index)
-            slide_info = self.reader.read_slide_content_lean(slide_index)
 
-            # 2. Export and read the high-res image
-            temp_file_path = os.path.abspath(f"temp_downsample.{file_format.lower()}")
-            export_width, export_height = self._get_slide_export_dimensions(1920)
-            slide.Export(temp_file_path, file_format, export_width, export_height)
-            image = cv2.imread(temp_file_path)
-            if image is None:
-                print(f"❌ Failed to load image from: {temp_file_path}")
-                os.remove(temp_file_path)
+            # 2. Export and read the image
+            export_width, export_height = self._get_slide_export_dimensions(1920 if hires else target_width)
+            downsampled_image = self._export_slide_image(slide, export_width, export_height, file_format)
+            if downsampled_image is None:
                 return None
 
-            # 3. Downsample the image FIRST
-            aspect_ratio = image.shape[0] / image.shape[1]
-            target_height = int(target_width * aspect_ratio)
-            downsampled_image = cv2.resize(image, (target_width, target_height), interpolation=cv2.INTER_AREA)
+            # 3. Downsample the supersampled export FIRST
+            if hires:
+                aspect_ratio = downsampled_image.shape[0] / downsampled_image.shape[1]
+                target_height = int(target_width * aspect_ratio)
+                # Halve with pyrDown while the image is at least twice the target, so INTER_AREA
+                # only has to cover the remaining non-integer ratio
+                while downsampled_image.shape[1] >= 2 * target_width:
+                    downsampled_image = cv2.pyrDown(downsampled_image)
+                downsampled_image = cv2.resize(downsampled_image, (target_width, target_height), interpolation=cv2.INTER_AREA)
             
             # 4. Draw overlays onto the downsampled image
             # Recalculate scale factors for the new, smaller dimensions
             scale_x = downsampled_image.shape[1] / self.slide_width_points
             scale_y = downsampled_image.shape[0] / self.slide_height_points
             
-            box_color = (0, 255, 0)
-            label_bg_color = (0, 255, 255)
-            label_text_color = (0, 0, 0)
-
-            # Dynamically calculate font size based on image width
+            # Dynamically calculate font size based on image width; thinner lines for the smaller image
             font_scale = max(0.3, target_width / 2000.0) # Make font smaller
             font_thickness = max(1, int(target_width / 512.0))
+            self._draw_shape_overlays(downsampled_image, slide_info, scale_x, scale_y, font_scale, font_thickness,
+                                      box_thickness=1, label_gap=5, label_pad=2)
 
-            for shape in slide_info.get('shapes', []):
-                static_id = shape.get('static_id')
-                if static_id is None: continue
-
-                x = int(shape.get('left', 0) * scale_x)
-                y = int(shape.get('top', 0) * scale_y)
-                w = int(shape.get('width', 0) * scale_x)
-                h = int(shape.get('height', 0) * scale_y)
-
-                # Use thinner lines for the smaller image
-                cv2.rectangle(downsampled_image, (x, y), (x + w, y + h), box_color, 1)
-                
-                id_text = f"ID:{static_id}"
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                # Use the new dynamic font scale and thickness
-                (tw, th), _ = cv2.getTextSize(id_text, font, font_scale, font_thickness)
-                
-                text_x, text_y = x, y - 5
-                if text_y < th: text_y = y + h + th + 5
-
-                cv2.rectangle(downsampled_image, (text_x, text_y - th - 2), (text_x + tw + 2, text_y + 2), label_bg_color, -1)
-                cv2.putText(downsampled_image, id_text, (text_x + 1, text_y), font, font_scale, label_text_color, font_thickness, cv2.LINE_AA)
-
-            # 5. Clean up the temporary file
-            os.remove(temp_file_path)
-
-            print(f"✅ Successfully created downsampled image with overlays of size {downsampled_image.shape[1]}x{downsampled_image.shape[0]}.")
+            logger.debug("Created downsampled image with overlays of size %dx%d", downsampled_image.shape[1], downsampled_image.shape[0])
             return downsampled_image
 
         except Exception as e:
-            print(f"❌ An error occurred while generating the downsampled image: {e}")
+            logger.error("An error occurred while generating the downsampled image: %s", e)
             return None
 
     def get_visual_context_for_agent(self, target_width=512, include_description=True):
@@ -175,40 +359,12 @@ class SlideVisualizer:
                 }
             
             # Generate description
-            description = ""
-            if include_description:
-                description = f"""
-=== VISUAL SLIDE REPRESENTATION ===
-
-This is an annotated visual representation of the current PowerPoint slide with the following features:
-
-🔍 VISUAL ANNOTATIONS:
-- Green bounding boxes highlight all interactive objects/shapes on the slide
-- Yellow labels show unique object IDs (e.g., "ID:123") for precise reference
-- Image is downsampled to {target_width}px width for efficient processing
-- All text, images, charts, and other slide elements are visually represented
-
-💡 HOW TO USE THIS IMAGE:
-- Use this visual context to understand the spatial layout of slide elements
-- Reference object IDs when making modifications (the IDs match the textual context)
-- Analyze positioning, sizing, and visual relationships between elements
-- Identify visual design issues, alignment problems, or layout improvements
-- This complements the textual slide context for comprehensive understanding
-
-⚠️ IMPORTANT NOTES:
-- Object IDs in yellow labels correspond exactly to the IDs in the textual context
-- Use the textual context for precise measurements and detailed properties
-- This image shows the current state of the slide at the time of generation
-- Visual and textual contexts are synchronized and represent the same slide state
-
-This visual representation enables you to provide more accurate and contextually aware assistance with slide design, layout, and content positioning.
-=== END VISUAL CONTEXT ===
-"""
+            description = _describe_visual_context(target_width) if include_description else ""
             
             return {
                 'success': True,
                 'image_base64': image_base64,
-                'description': description.strip()
+                'description': description
             }
             
         except Exception as e:
@@ -223,8 +379,9 @@ This visual representation enables you to provide more accurate and contextually
         Creates an image of the current slide with rulers and highlighted objects.
 
         Args:
-            output_path (str): The path to save the highlighted image.
-            export_width (int): The width in pixels for the exported PNG image.
+            output_path (str): The path to save the highlighted image. The extension picks the
+                format; PNG uses fast compression, JPEG quality 90.
+            export_width (int): The width in pixels for the exported slide image.
             border_size (int): The size of the border for drawing rulers.
 
         Returns:
@@ -234,125 +391,91 @@ This visual representation enables you to provide more accurate and contextually
 
         # 1. Get current slide context
         t_read_start = time.time()
-        slide_index = self.reader.get_current_slide_index()
+        slide_index, slide_info = self.reader.get_index_and_content()
         if not slide_index:
-            print("❌ Could not get current slide index.")
+            logger.error("Could not get current slide index.")
             return None
-        slide_info = self.reader.read_slide_content_lean(slide_index)
         t_read_end = time.time()
         
         if isinstance(slide_info, str):
-            print(f"❌ Error reading slide content: {slide_info}")
+            logger.error("Error reading slide content: %s", slide_info)
             return None
 
-        # 2. Export slide as a temporary PNG
+        # 2. Export the slide and load it with OpenCV
         t_export_start = time.time()
         slide = self.presentation.Slides(slide_index)
-        temp_png_path = os.path.abspath(f"temp_slide_{slide_index}.png")
-        
         width, height = self._get_slide_export_dimensions(export_width)
-        slide.Export(temp_png_path, "PNG", width, height)
-        
+        slide_image = self._export_slide_image(slide, width, height)
         t_export_end = time.time()
-
-        # 3. Load the exported image with OpenCV
-        t_draw_start = time.time()
-        slide_image = cv2.imread(temp_png_path)
         if slide_image is None:
-            print(f"❌ Failed to load image from: {temp_png_path}")
-            if os.path.exists(temp_png_path):
-                os.remove(temp_png_path)
             return None
-        
-        # 4. Create a new canvas with a border
+
+        # 3. Calculate scaling factors
+        t_draw_start = time.time()
         img_height, img_width, _ = slide_image.shape
-        canvas_height = img_height + 2 * border_size
-        canvas_width = img_width + 2 * border_size
-        canvas = np.full((canvas_height, canvas_width, 3), 255, dtype=np.uint8)
-        
-        # Paste the slide image onto the canvas
-        canvas[border_size : border_size + img_height, border_size : border_size + img_width] = slide_image
-        
-        # 5. Calculate scaling factors
         scale_x = img_width / self.slide_width_points
         scale_y = img_height / self.slide_height_points
 
-        # 6. Draw rulers on the canvas
-        self._draw_rulers(canvas, border_size, img_width, img_height, scale_x, scale_y)
+        # 4. Start from the pre-rendered rulers and paste the slide image into the border
+        ruler_layer = self._get_ruler_layer(border_size, img_width, img_height, scale_x, scale_y)
+        canvas = self._canvas
+        if canvas is None or canvas.shape != ruler_layer.shape:
+            canvas = self._canvas = np.empty_like(ruler_layer)
+        # Only the border strips need restoring (labels may have spilled into them last time);
+        # the interior is overwritten by the slide image
+        top, bottom = border_size, border_size + img_height
+        left, right = border_size, border_size + img_width
+        canvas[:top] = ruler_layer[:top]
+        canvas[bottom:] = ruler_layer[bottom:]
+        canvas[top:bottom, :left] = ruler_layer[top:bottom, :left]
+        canvas[top:bottom, right:] = ruler_layer[top:bottom, right:]
+        canvas[top:bottom, left:right] = slide_image
+
+        # 5. The ruler axes run along the image's first row and column, so redraw them over it
+        self._draw_ruler_axes(canvas, border_size, img_width, img_height)
         
-        # 7. Draw overlays for each shape on the canvas
-        # Define high-contrast colors (BGR format)
-        box_color = (0, 255, 0)  # Bright Green
-        label_bg_color = (0, 255, 255) # Bright Yellow
-        label_text_color = (0, 0, 0) # Black
-
-        shapes = slide_info.get('shapes', [])
-
+        # 6. Draw overlays for each shape on the canvas
         # Dynamically calculate font size based on image width
         font_scale = max(0.5, export_width / 2500.0) # Make font bigger
         font_thickness = max(1, int(export_width / 800.0)) # Make font thicker
-
-        for shape in shapes:
-            try:
-                static_id = shape.get('static_id')
-                if static_id is None:
-                    continue
-
-                # Scale coordinates and offset for the canvas
-                x = int(shape.get('left', 0) * scale_x) + border_size
-                y = int(shape.get('top', 0) * scale_y) + border_size
-                w = int(shape.get('width', 0) * scale_x)
-                h = int(shape.get('height', 0) * scale_y)
-
-                # Draw bounding box
-                cv2.rectangle(canvas, (x, y), (x + w, y + h), box_color, 2)
-
-                # Prepare text label for the shape ID
-                id_text = f"ID:{static_id}"
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                # Use the new dynamic font scale and thickness
-                text_size, _ = cv2.getTextSize(id_text, font, font_scale, font_thickness)
-                
-                text_x = x
-                text_y = y - 10
-                if text_y < text_size[1]:
-                    text_y = y + h + text_size[1] + 5
-
-                # Add filled background for text
-                cv2.rectangle(canvas, (text_x, text_y - text_size[1] - 5), 
-                              (text_x + text_size[0] + 5, text_y + 5), label_bg_color, -1)
-                cv2.putText(canvas, id_text, (text_x + 2, text_y), 
-                            font, font_scale, label_text_color, font_thickness, cv2.LINE_AA)
-
-            except Exception as e:
-                print(f"⚠️ Error processing shape {shape.get('name', 'N/A')}: {e}")
+        self._draw_shape_overlays(canvas, slide_info, scale_x, scale_y, font_scale, font_thickness,
+                                  box_thickness=2, label_gap=10, label_pad=5, offset=border_size)
 
         t_draw_end = time.time()
 
-        # 8. Save the final image
+        # 7. Save the final image
         t_save_start = time.time()
-        cv2.imwrite(output_path, canvas)
+        cv2.imwrite(output_path, canvas, _IMWRITE_PARAMS.get(os.path.splitext(output_path)[1].lower(), []))
         t_save_end = time.time()
 
-        # 9. Clean up temporary file
-        os.remove(temp_png_path)
-        
         t_end = time.time()
 
-        # Print performance metrics
-        print("\n--- Performance ---")
-        print(f"Read slide content: {t_read_end - t_read_start:.4f}s")
-        print(f"Export slide image: {t_export_end - t_export_start:.4f}s")
-        print(f"Draw overlays:      {t_draw_end - t_draw_start:.4f}s")
-        print(f"Save final image:   {t_save_end - t_save_start:.4f}s")
-        print("---------------------")
-        print(f"Total time:         {t_end - t_start:.4f}s")
-        print("---------------------\n")
+        logger.debug(
+            "Highlighted slide timings: read %.4fs, export %.4fs, draw %.4fs, save %.4fs, total %.4fs",
+            t_read_end - t_read_start, t_export_end - t_export_start, t_draw_end - t_draw_start,
+            t_save_end - t_save_start, t_end - t_start,
+        )
         
-        print(f"✅ Highlighted slide image with rulers saved to: {output_path}")
+        logger.info("Highlighted slide image with rulers saved to: %s", output_path)
 
         return output_path
         
+    def _get_ruler_layer(self, border, width, height, scale_x, scale_y):
+        """Returns a white bordered canvas with the rulers drawn, rendering it only when the geometry changes."""
+        key = (border, width, height, self.slide_width_points, self.slide_height_points)
+        if self._ruler_layer_key != key:
+            layer = np.full((height + 2 * border, width + 2 * border, 3), 255, dtype=np.uint8)
+            self._draw_rulers(layer, border, width, height, scale_x, scale_y)
+            self._ruler_layer = layer
+            self._ruler_layer_key = key
+        return self._ruler_layer
+
+    @staticmethod
+    def _draw_ruler_axes(canvas, border, width, height):
+        """Draws the X and Y ruler base lines along the top and left edges of the slide image."""
+        cv2.line(canvas, (border, border), (border + width, border), (0,0,0), 1)
+        cv2.line(canvas, (border, border), (border, border + height), (0,0,0), 1)
+
     def _draw_rulers(self, canvas, border, width, height, scale_x, scale_y, tick_interval=25):
         """
         Draws X and Y rulers on the canvas with finer ticks and endpoint markers.
@@ -386,8 +509,9 @@ This visual representation enables you to provide more accurate and contextually
                 if is_major:
                     cv2.putText(canvas, value_text, (border - tick_len - text_size[0] - 5, pos + text_size[1] // 2), font, font_scale, (0,0,0), font_thickness)
 
+        self._draw_ruler_axes(canvas, border, width, height)
+
         # --- X-axis Ruler (Top) ---
-        cv2.line(canvas, (border, border), (border + width, border), (0,0,0), 1)
         for i in range(0, int(self.slide_width_points), tick_interval):
             px = int(i * scale_x) + border
             is_major_tick = (i % (tick_interval * 2) == 0) # Make every other tick major
@@ -397,7 +521,6 @@ This visual representation enables you to provide more accurate and contextually
         draw_tick(end_x_px, str(int(self.slide_width_points)), is_major=True, is_x_axis=True)
 
         # --- Y-axis Ruler (Left) ---
-        cv2.line(canvas, (border, border), (border, border + height), (0,0,0), 1)
         for i in range(0, int(self.slide_height_points), tick_interval):
             py = int(i * scale_y) + border
             is_major_tick = (i % (tick_interval * 2) == 0) # Make every other tick major
@@ -420,7 +543,7 @@ def test_visualizer():
 
         # --- Test 1: Full-resolution highlighted image ---
         print("\n🖼️  Test 1: Generating full-resolution highlighted image...")
-        full_res_output = visualizer.create_highlighted_slide_image()
+        full_res_output = visualizer.create_highlighted_slide_image(output_path="highlighted_slide.jpg")
         if full_res_output and os.path.exists(full_res_output):
             print(f"🎉 Full-resolution test successful! Check file: {full_res_output}")
         else: